@@ -1,18 +1,54 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import json
 import time
 
 #posting file and api endpoint
 POSTINGS_URL = "https://fd4c61a1-d161-4de2-92e4-50fd468a8e82.mock.pstmn.io/postings"
 MATCH_API_URL = "http://127.0.0.1:8000/match"
+MATCH_STREAM_API_URL = "http://127.0.0.1:8000/match/stream"
 CALENDLY_API_URL = "http://localhost:8000/generate-calendly-link-send-email"
+SHORTLIST_API_URL = "http://localhost:8000/shortlist/dispatch"
+RESULTS_API_URL = "http://127.0.0.1:8000/postings/{job_id}/results"
+RESULTS_PAGE_SIZE = 10
+
+# (connect, read) timeouts in seconds; streamed matches can take a while between candidates
+REQUEST_TIMEOUT = (5, 30)
+MATCH_TIMEOUT = (5, 300)
+
+@st.cache_resource(show_spinner=False)
+def http_session():
+    """One keep-alive session shared across reruns; GETs are retried with jittered backoff."""
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Postings rarely change, so keep them across Streamlit reruns instead of refetching on every interaction
+POSTINGS_CACHE_TTL = 300
+
+@st.cache_data(ttl=POSTINGS_CACHE_TTL, show_spinner=False)
+def load_postings():
+    """Downloads the postings list; cached by Streamlit for POSTINGS_CACHE_TTL seconds."""
+    response = http_session().get(POSTINGS_URL, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
 
 def fetch_postings():
     """Fetches job postings from the mock API and ensures it's a list."""
     try:
-        response = requests.get(POSTINGS_URL)
-        response.raise_for_status()
-        data = response.json()
+        data = load_postings()
         
         if isinstance(data, dict):
             data = data.get("postings", [])
@@ -35,14 +71,78 @@ def send_email(candidate_id, candidate_name, candidate_email, job_title):
         "job_title": job_title
     }
     try:
-        response = requests.post(CALENDLY_API_URL, json=payload)
+        response = http_session().post(CALENDLY_API_URL, json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         response_data = response.json()
-        st.success("Email sent Successfully!")
+        st.success(response_data.get("message", "Email sent Successfully!"))
         st.write(response_data.get("msg", "No message available"))
     except requests.exceptions.RequestException as e:
         st.error(f"Error generating Calendly link: {e}")
 
+def send_bulk_emails(candidates):
+    """Sends the Calendly invitation to every given candidate in one request."""
+    payload = {
+        "candidates": [
+            {
+                "candidate_id": candidate["candidate_id"],
+                "candidate_name": candidate["name"],
+                "candidate_email": candidate["email"],
+                "job_title": candidate["job_title"],
+            }
+            for candidate in candidates
+        ]
+    }
+    try:
+        response = http_session().post(SHORTLIST_API_URL, json=payload, timeout=MATCH_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        st.success(", ".join(f"{count} {status}" for status, count in data["counts"].items()))
+        failed = [r for r in data["results"] if r["status"] == "failed"]
+        for result in failed:
+            st.error(f"{result['candidate_email']}: {result['error']}")
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error sending emails: {e}")
+
+def format_score(candidate):
+    """The match score, or N/A when the candidate could not be assessed."""
+    if candidate.get("match_score") is None:
+        return f"N/A ({candidate.get('error') or 'not assessed'})"
+    return candidate["match_score"]
+
+def fetch_results_page(job_id, cursor=None):
+    """One page of the stored ranking for a posting, best score first."""
+    params = {"limit": RESULTS_PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    response = http_session().get(RESULTS_API_URL.format(job_id=job_id), params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def stream_matches(payload, placeholder):
+    """Calls the streaming match API and renders each candidate as soon as it is scored."""
+    results = []
+    with http_session().post(MATCH_STREAM_API_URL, json=payload, stream=True, timeout=MATCH_TIMEOUT) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("type") == "match":
+                results.append(event["data"])
+                with placeholder.container():
+                    st.caption(f"{len(results)} candidates scored so far...")
+                    for candidate in results:
+                        st.markdown("<div class='candidate-card'>", unsafe_allow_html=True)
+                        st.markdown(f"<div class='candidate-header'>{candidate['name']}</div>", unsafe_allow_html=True)
+                        st.write(f"**Fit Out Score:** {format_score(candidate)}")
+                        st.write(candidate["assessment"])
+                        st.markdown("</div>", unsafe_allow_html=True)
+            elif event.get("type") == "summary":
+                st.caption(f"Scored {event['count']} candidates in {event['elapsed_seconds']}s")
+                if event.get("partial"):
+                    st.warning(f"Time budget ran out, {event['pending']} candidates were not scored")
+    return results
+
 def main():
     st.markdown(
         """
@@ -61,16 +161,18 @@ def main():
     st.image("ideals_white.png", width=150)
     st.title("Job Matching Interface")
 
-    if "candidates" not in st.session_state:
-        st.session_state.candidates = []
+    # Results live in the API's results store; only the page cursors and the shortlist are kept here
+    if "result_cursors" not in st.session_state:
+        st.session_state.result_cursors = [None]
+    if "shortlist" not in st.session_state:
+        st.session_state.shortlist = {}
     if "show_email" not in st.session_state:
         st.session_state.show_email = {}
     if "selected_job" not in st.session_state:
         st.session_state.selected_job = ""
-    if "selected_model" not in st.session_state:
-        st.session_state.selected_model = ""
 
     postings = fetch_postings()
+    job_id = None
 
     if postings:
         try:
@@ -84,31 +186,55 @@ def main():
 
         selected_job = st.selectbox("Select Job ID", job_ids)
         selected_model_name = st.selectbox("Select Model Name", job_models)
+        # Cascade: the selected model scores everyone, close calls are re-scored by a larger model
+        use_cascade = st.checkbox("Re-score close calls with a larger model")
+        escalation_model = None
+        if use_cascade:
+            escalation_model = st.selectbox("Escalation Model", job_models, index=job_models.index("qwen-2.5-32b"))
+        # Candidates not scored within the budget are skipped, 0 waits for everyone
+        time_budget = st.number_input("Time Budget (seconds, 0 = no limit)", min_value=0, value=0, step=5)
 
         job_id = selected_job.split(" - ")[0]  
-        job_title = selected_job.split(" - ")[1] 
+        if job_id != st.session_state.selected_job:
+            st.session_state.selected_job = job_id
+            st.session_state.result_cursors = [None]
         if st.button("Send", key="send_button", help="Click to fetch candidate matches"):
             payload = {
                 "job_id": job_id,
                 "model_name": selected_model_name,
+                "cascade": use_cascade,
+                "escalation_model": escalation_model,
+                "time_budget": time_budget or None,
             }
+            placeholder = st.empty()
             with st.spinner("Processing... Please wait."):
-                time.sleep(2)  
                 try:
-                    response = requests.post(MATCH_API_URL, json=payload)
-                    response.raise_for_status()
-                    st.session_state.candidates = response.json()
+                    stream_matches(payload, placeholder)
                 except requests.exceptions.RequestException as e:
                     st.error(f"Error calling match API: {e}")
+            # The full interactive cards are rendered below from the stored ranking
+            placeholder.empty()
+            st.session_state.result_cursors = [None]
+
+    page = None
+    if job_id:
+        try:
+            page = fetch_results_page(job_id, st.session_state.result_cursors[-1])
+        except requests.exceptions.RequestException as e:
+            st.error(f"Error loading stored results: {e}")
 
-    if st.session_state.candidates:
-        for candidate in st.session_state.candidates:
+    if page and page["results"]:
+        first = (len(st.session_state.result_cursors) - 1) * RESULTS_PAGE_SIZE + 1
+        st.caption(f"Showing {first}-{first + len(page['results']) - 1} of {page['total']} assessed candidates")
+        for candidate in page["results"]:
             with st.container():
                 st.markdown("<div class='candidate-card'>", unsafe_allow_html=True)
                 st.markdown(f"<div class='candidate-header'>{candidate['name']}</div>", unsafe_allow_html=True)
                 st.write(f"**Candidate ID:** {candidate['candidate_id']}")
                 st.write(f"**Candidate Email:** {candidate['email']}")
-                st.write(f"**Fit Out Score:** {candidate['match_score']}")
+                st.write(f"**Fit Out Score:** {format_score(candidate)}")
+                if candidate.get("model_name"):
+                    st.write(f"**Scored By:** {candidate['model_name']}")
                 st.write(f"**Job Title:** {candidate['job_title']}")
                 ai_response = st.text_area("Modify AI Response", candidate["assessment"], key=f"response_{candidate['candidate_id']}")
                 
@@ -120,10 +246,12 @@ def main():
                 
                 if action == "Move to Next Stage":
                     st.session_state.show_email[candidate['candidate_id']] = True
+                    st.session_state.shortlist[candidate['candidate_id']] = candidate
                     st.success("Comment saved and stage updated in the platform:")
                     st.write(ai_response)
                 else:
                     st.session_state.show_email[candidate['candidate_id']] = False
+                    st.session_state.shortlist.pop(candidate['candidate_id'], None)
                     
                 if st.session_state.show_email.get(candidate['candidate_id']):
                     if st.button("Send Email", key=f"email_{candidate['candidate_id']}"):
@@ -131,6 +259,21 @@ def main():
                             time.sleep(1)
                             send_email(candidate['candidate_id'], candidate['name'], candidate['email'], candidate['job_title'])
                 st.markdown("</div>", unsafe_allow_html=True)
+
+        previous_col, next_col = st.columns(2)
+        if len(st.session_state.result_cursors) > 1 and previous_col.button("Previous page", key="previous_page"):
+            st.session_state.result_cursors.pop()
+            st.rerun()
+        if page["next_cursor"] and next_col.button("Next page", key="next_page"):
+            st.session_state.result_cursors.append(page["next_cursor"])
+            st.rerun()
+
+        # Everyone moved to the next stage, on any page, can be emailed at once instead of one click per candidate
+        shortlisted = list(st.session_state.shortlist.values())
+        if len(shortlisted) > 1:
+            if st.button(f"Send Email to all {len(shortlisted)} shortlisted candidates", key="email_all"):
+                with st.spinner("Sending Emails... Please wait."):
+                    send_bulk_emails(shortlisted)
     else:
         st.warning("No candidates available.")
 
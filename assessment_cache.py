@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+def content_hash(value) -> str:
+    """Stable hash of any JSON-serializable value."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AssessmentCache:
+    """SQLite-backed cache of LLM assessments.
+
+    Keys are built from the model name, the prompt template version and content hashes of the
+    normalized posting and candidate inputs, so any change to one of them is a natural miss.
+    Entries expire after ttl seconds and the least recently used ones are evicted beyond
+    max_entries.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expired = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS assessments (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_assessments_last_access ON assessments (last_access)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+
+    @staticmethod
+    def make_key(model_name: str, prompt_version: str, posting_inputs: Dict, candidate_inputs: Dict) -> str:
+        return content_hash([model_name, prompt_version, content_hash(posting_inputs), content_hash(candidate_inputs)])
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT result, created_at FROM assessments WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            result, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM assessments WHERE key = ?", (key,))
+                self._conn.commit()
+                self._entries -= 1
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE assessments SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(result)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def put(self, key: str, model_name: str, prompt_version: str, result: Dict):
+        now = time.time()
+        with self._lock:
+            existing = self._conn.execute("SELECT 1 FROM assessments WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO assessments (key, model, prompt_version, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, prompt_version, json.dumps(result), now, now),
+            )
+            if not existing:
+                self._entries += 1
+            self.stores += 1
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM assessments WHERE key IN "
+                    "(SELECT key FROM assessments ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                self._entries -= overflow
+                self.evictions += overflow
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bypassed": self.bypassed,
+                "stores": self.stores,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
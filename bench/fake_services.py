@@ -0,0 +1,510 @@
+"""Local stand-ins for every upstream main.py talks to, so it can be benchmarked offline.
+
+One HTTP server covers the postings/candidates feed, resume PDFs, the Groq chat-completions
+API and the Calendly scheduling-links API; a second tiny server is an SMTP sink. Every
+handler records how long it spent per stage so the benchmark can break latency down.
+
+Run it on its own to poke at the fakes manually:
+
+    python bench/fake_services.py --candidates 200 --llm-latency 0.3
+"""
+import argparse
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+SKILLS = [
+    "python", "java", "go", "rust", "typescript", "react", "django", "fastapi", "aws", "gcp",
+    "docker", "kubernetes", "terraform", "sql", "postgres", "spark", "airflow", "ml", "nlp",
+    "pytorch", "kafka", "redis", "graphql", "ci/cd", "linux", "security", "scala", "swift",
+]
+TITLES = ["Backend Engineer", "Data Engineer", "Frontend Engineer", "ML Engineer", "DevOps Engineer"]
+CITIES = ["Berlin", "London", "Lisbon", "Warsaw", "Amsterdam", "Remote"]
+
+
+class StageRecorder:
+    """Thread-safe per-stage duration samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float, error: bool = False):
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+            if error:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                stage: {"samples": list(samples), "errors": self._errors.get(stage, 0)}
+                for stage, samples in self._samples.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._errors.clear()
+
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """Builds a minimal text PDF (Helvetica, one text block per page) that PyPDF2 can parse."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        stream = "BT /F1 11 Tf 72 740 Td 14 TL " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content_ref} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+class FakeWorld:
+    """Deterministic synthetic postings, candidates and resumes."""
+
+    def __init__(self, base_url: str, candidates: int, postings: int, resume_pages: int, duplicate_rate: float, seed: int):
+        rng = random.Random(seed)
+        self.postings = []
+        for i in range(postings):
+            title = rng.choice(TITLES)
+            skills = rng.sample(SKILLS, 6)
+            city = rng.choice(CITIES)
+            self.postings.append({
+                "id": f"posting-{i}",
+                "text": f"Senior {title}",
+                "categories": {
+                    "commitment": "Full-time",
+                    "location": city,
+                    "team": "Engineering",
+                    "allLocations": [city, "Remote"],
+                },
+                "tags": skills[:3],
+                "content": {
+                    "description": f"We are hiring a {title} to build data-heavy products. " * 5,
+                    "lists": [
+                        {"text": "Requirements", "content": "".join(f"<li>{skill} experience</li>" for skill in skills)},
+                        {"text": "Nice to have", "content": "<li>English</li><li>Startup experience</li>"},
+                    ],
+                },
+                "country": "EU",
+                "workplaceType": "hybrid",
+            })
+
+        self.candidates = []
+        self.resumes: Dict[str, bytes] = {}
+        for i in range(candidates):
+            if self.candidates and rng.random() < duplicate_rate:
+                # Re-application: same person and resume under a new id
+                original = rng.choice(self.candidates)
+                duplicate = dict(original, id=f"candidate-{i}", origin=rng.choice(["applied", "sourced", "referred"]))
+                self.candidates.append(duplicate)
+                continue
+            skills = rng.sample(SKILLS, 5)
+            city = rng.choice(CITIES)
+            name = f"Candidate {i}"
+            resume_id = f"resume-{i}"
+            pages = []
+            for page in range(resume_pages):
+                lines = [f"{name} - {rng.choice(TITLES)}", f"{city} | candidate{i}@example.com"]
+                for _ in range(30):
+                    lines.append(f"Worked with {', '.join(rng.sample(SKILLS, 3))} for {rng.randint(1, 6)} years")
+                pages.append(lines)
+            self.resumes[resume_id] = make_pdf(pages)
+            self.candidates.append({
+                "id": f"candidate-{i}",
+                "name": name,
+                "headline": f"{rng.choice(TITLES)} with {rng.randint(1, 12)} years of experience",
+                "location": city,
+                "tags": skills,
+                "origin": rng.choice(["applied", "sourced", "referred"]),
+                "opportunityLocation": rng.choice([city, "Remote"]),
+                "emails": [f"candidate{i}@example.com"],
+                "resume_url": f"{base_url}/resumes/{resume_id}.pdf",
+            })
+
+
+class FakeServiceConfig:
+    def __init__(self, llm_latency=0.3, llm_jitter=0.1, llm_error_rate=0.0, resume_latency=0.02,
+                 data_latency=0.05, calendly_latency=0.05, smtp_latency=0.01, llm_rpm=0, llm_token_latency=0.002,
+                 seed=1):
+        self.llm_latency = llm_latency
+        # Generation time per output token, on top of llm_latency (time to first token)
+        self.llm_token_latency = llm_token_latency
+        self.llm_jitter = llm_jitter
+        self.llm_error_rate = llm_error_rate
+        self.resume_latency = resume_latency
+        self.data_latency = data_latency
+        self.calendly_latency = calendly_latency
+        self.smtp_latency = smtp_latency
+        # Requests per minute accepted by the fake LLM before it answers 429 (0 = unlimited)
+        self.llm_rpm = llm_rpm
+        self._llm_calls = deque()
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def llm_delay(self) -> float:
+        with self.rng_lock:
+            return max(0.0, self.llm_latency + self.rng.uniform(-self.llm_jitter, self.llm_jitter))
+
+    def llm_rate_limit(self):
+        """Seconds until the sliding one-minute window has room again, or None if the call is accepted."""
+        if not self.llm_rpm:
+            return None
+        with self.rng_lock:
+            now = time.monotonic()
+            while self._llm_calls and now - self._llm_calls[0] >= 60:
+                self._llm_calls.popleft()
+            if len(self._llm_calls) >= self.llm_rpm:
+                return 60 - (now - self._llm_calls[0])
+            self._llm_calls.append(now)
+            return None
+
+    def llm_failure(self):
+        """Returns the HTTP status of an injected failure (half 429s, half 500s), or None."""
+        with self.rng_lock:
+            if self.rng.random() >= self.llm_error_rate:
+                return None
+            return 429 if self.rng.random() < 0.5 else 500
+
+
+FAKE_REASONING = (
+    "The posting asks for specific skills, so I should compare them with the candidate's headline, tags "
+    "and resume. Location matters too, and whether relocation is an option. Let me weigh the overlap "
+    "against the gaps before settling on a score. "
+) * 12
+
+
+def fake_answer(model: str, answer: str) -> str:
+    """Wraps the JSON answer the way real models do: reasoning models think first and add a note after."""
+    if "deepseek" in (model or ""):
+        return (f"<think>\n{FAKE_REASONING}\n</think>\n\n```json\n{answer}\n```\n\n"
+                "This score reflects the overlap between the listed skills and the requirements, "
+                "the candidate's location, and the seniority implied by the headline.")
+    return "```json\n" + answer + "\n```"
+
+
+def fake_assessment(text: str) -> Dict:
+    # Stable score per prompt so cached and uncached runs agree
+    score = sum(text.encode("utf-8")) % 101
+    return {"score": score, "assessment": "Solid overlap with the core requirements; limited evidence of the nice-to-haves."}
+
+
+def make_http_handler(world: FakeWorld, config: FakeServiceConfig, recorder: StageRecorder):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: Dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, payload, headers: Dict = None):
+            self._send(status, json.dumps(payload).encode("utf-8"), headers=headers)
+
+        def _read_json(self) -> Dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            started = time.perf_counter()
+            if self.path in ("/postings", "/candidates"):
+                time.sleep(config.data_latency)
+                key = self.path.strip("/")
+                etag = f'"{key}-{len(getattr(world, key))}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", headers={"ETag": etag})
+                else:
+                    self._send_json(200, {key: getattr(world, key)}, headers={"ETag": etag})
+                recorder.record("data_fetch", time.perf_counter() - started)
+            elif self.path.startswith("/resumes/"):
+                time.sleep(config.resume_latency)
+                resume_id = self.path.rsplit("/", 1)[-1].replace(".pdf", "")
+                pdf = world.resumes.get(resume_id)
+                if pdf is None:
+                    self._send_json(404, {"error": "not found"})
+                else:
+                    etag = f'"{resume_id}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self._send(304, b"", headers={"ETag": etag})
+                    else:
+                        self._send(200, pdf, "application/pdf", headers={"ETag": etag})
+                recorder.record("resume_download", time.perf_counter() - started, error=pdf is None)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            started = time.perf_counter()
+            if self.path.endswith("/chat/completions"):
+                self._chat_completion(self._read_json(), started)
+            elif self.path.endswith("/scheduling_links"):
+                self._read_json()
+                time.sleep(config.calendly_latency)
+                self._send_json(201, {
+                    "resource": {
+                        "booking_url": f"https://calendly.example/d/{uuid.uuid4().hex[:12]}",
+                        "owner": "https://api.calendly.com/event_types/012345678901234567890",
+                        "owner_type": "EventType",
+                    }
+                })
+                recorder.record("calendly", time.perf_counter() - started)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def _chat_completion(self, body: Dict, started: float):
+            retry_after = config.llm_rate_limit()
+            if retry_after is not None:
+                self._send_json(429, {"error": {"message": "Rate limit reached for requests", "type": "requests"}},
+                                headers={"retry-after": f"{retry_after:.2f}"})
+                recorder.record("llm_rate_limited", time.perf_counter() - started, error=True)
+                return
+            time.sleep(config.llm_delay())
+            failure = config.llm_failure()
+            if failure:
+                if failure == 429:
+                    self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                                    headers={"retry-after": "1"})
+                else:
+                    self._send_json(500, {"error": {"message": "Internal error", "type": "server_error"}})
+                recorder.record("llm", time.perf_counter() - started, error=True)
+                return
+
+            prompt = "".join(message.get("content", "") for message in body.get("messages", []))
+            candidate_ids = re.findall(r"Candidate ID: (\S+)", prompt)
+            if candidate_ids:
+                answer = json.dumps([
+                    dict(fake_assessment(prompt + candidate_id), candidate_id=candidate_id)
+                    for candidate_id in candidate_ids
+                ])
+            else:
+                answer = json.dumps(fake_assessment(prompt))
+            content = fake_answer(body.get("model"), answer)
+
+            prompt_tokens = len(prompt) // 4 + 1
+            if body.get("stream"):
+                self._stream_completion(body, content, prompt_tokens, started)
+                return
+            completion_tokens = len(content) // 4 + 1
+            time.sleep(completion_tokens * config.llm_token_latency)
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            })
+            recorder.record("llm", time.perf_counter() - started)
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _stream_completion(self, body: Dict, content: str, prompt_tokens: int, started: float):
+            # Server-sent events, 8 tokens (~32 characters) per chunk, usage in x_groq of the last chunk
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def event(delta: Dict, finish_reason=None, usage=None) -> bytes:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                if usage:
+                    chunk["x_groq"] = {"id": completion_id, "usage": usage}
+                return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+            try:
+                self._write_chunk(event({"role": "assistant", "content": ""}))
+                for i in range(0, len(content), 32):
+                    time.sleep(8 * config.llm_token_latency)
+                    self._write_chunk(event({"content": content[i:i + 32]}))
+                completion_tokens = len(content) // 4 + 1
+                self._write_chunk(event({}, "stop", {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }))
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading once it had its answer
+                self.close_connection = True
+            recorder.record("llm", time.perf_counter() - started)
+
+    return Handler
+
+
+def make_smtp_handler(config: FakeServiceConfig, recorder: StageRecorder, inbox: List[bytes]):
+    class SMTPSinkHandler(socketserver.StreamRequestHandler):
+        """Just enough SMTP for smtplib: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, QUIT."""
+
+        def _reply(self, line: str):
+            self.wfile.write(line.encode("ascii") + b"\r\n")
+
+        def handle(self):
+            self._reply("220 bench SMTP sink ready")
+            message_lines = None
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                if message_lines is not None:
+                    if line.rstrip(b"\r\n") == b".":
+                        started = time.perf_counter()
+                        time.sleep(config.smtp_latency)
+                        inbox.append(b"".join(message_lines))
+                        message_lines = None
+                        self._reply("250 OK: queued")
+                        recorder.record("smtp_send", time.perf_counter() - started)
+                    else:
+                        message_lines.append(line)
+                    continue
+
+                command = line.strip().split(b" ", 1)[0].upper()
+                if command == b"EHLO":
+                    self._reply("250-bench.local")
+                    self._reply("250 AUTH PLAIN")
+                elif command == b"AUTH":
+                    self._reply("235 2.7.0 Authentication successful")
+                elif command == b"DATA":
+                    message_lines = []
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                elif command == b"QUIT":
+                    self._reply("221 Bye")
+                    return
+                else:
+                    self._reply("250 OK")
+
+    return SMTPSinkHandler
+
+
+class FakeServices:
+    """Starts the fake HTTP upstreams and the SMTP sink on background threads."""
+
+    def __init__(self, host: str = "127.0.0.1", http_port: int = 0, smtp_port: int = 0, candidates: int = 200,
+                 postings: int = 5, resume_pages: int = 2, duplicate_rate: float = 0.0,
+                 config: FakeServiceConfig = None, seed: int = 1):
+        self.config = config or FakeServiceConfig(seed=seed)
+        self.recorder = StageRecorder()
+        self.inbox: List[bytes] = []
+        self._http = ThreadingHTTPServer((host, http_port), BaseHTTPRequestHandler)
+        self.base_url = f"http://{host}:{self._http.server_address[1]}"
+        self.world = FakeWorld(self.base_url, candidates, postings, resume_pages, duplicate_rate, seed)
+        self._http.RequestHandlerClass = make_http_handler(self.world, self.config, self.recorder)
+        self._http.daemon_threads = True
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._smtp = socketserver.ThreadingTCPServer((host, smtp_port), make_smtp_handler(self.config, self.recorder, self.inbox))
+        self._smtp.daemon_threads = True
+        self.smtp_host = host
+        self.smtp_port = self._smtp.server_address[1]
+        self._threads = []
+
+    def start(self) -> "FakeServices":
+        for server in (self._http, self._smtp):
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in (self._http, self._smtp):
+            server.shutdown()
+            server.server_close()
+
+    def app_env(self) -> Dict[str, str]:
+        """Environment variables that point main.py at these fakes."""
+        return {
+            "POSTINGS_URL": f"{self.base_url}/postings",
+            "CANDIDATES_URL": f"{self.base_url}/candidates",
+            "GROQ_BASE_URL": self.base_url,
+            "GROQ_API_KEY": "bench-key",
+            "CALENDLY_SCHEDULING_LINKS_URL": f"{self.base_url}/calendly/scheduling_links",
+            "CALENDLY_API_KEY": "bench-key",
+            "SMTP_HOST": self.smtp_host,
+            "SMTP_PORT": str(self.smtp_port),
+            "SMTP_STARTTLS": "false",
+            "SMTP_EMAIL": "recruiting@example.com",
+            "SMTP_PASSWORD": "bench-password",
+            "SEND_EMAILS": "true",
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--http-port", type=int, default=8900)
+    parser.add_argument("--smtp-port", type=int, default=8925)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--postings", type=int, default=5)
+    parser.add_argument("--resume-pages", type=int, default=2)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-token-latency", type=float, default=0.002, help="seconds per generated output token")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rpm", type=int, default=0, help="answer 429 above this many LLM calls per minute")
+    args = parser.parse_args()
+
+    config = FakeServiceConfig(llm_latency=args.llm_latency, llm_jitter=args.llm_jitter, llm_error_rate=args.llm_error_rate,
+                                llm_rpm=args.llm_rpm, llm_token_latency=args.llm_token_latency)
+    services = FakeServices(http_port=args.http_port, smtp_port=args.smtp_port, candidates=args.candidates,
+                            postings=args.postings, resume_pages=args.resume_pages,
+                            duplicate_rate=args.duplicate_rate, config=config).start()
+    print("Fake services running. Start the API with:")
+    for key, value in services.app_env().items():
+        print(f"  export {key}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
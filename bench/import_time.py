@@ -0,0 +1,115 @@
+"""Import-time budget for main.py.
+
+Imports main in fresh interpreters with -X importtime and prints the median time of
+`import main`, the slowest modules it pulls in directly, and any module that should only be
+loaded by the warm-up (groq, numpy, smtplib, PyPDF2) but was imported eagerly. Exits with
+status 1 when the budget is exceeded or a lazy module leaked onto the import path.
+
+    python bench/import_time.py --runs 5 --budget-ms 750
+    python bench/import_time.py --ready   # also time a uvicorn worker from spawn to 200 on /ready
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_services import FakeServiceConfig, FakeServices  # noqa: E402
+from run_bench import REPO_ROOT, start_api  # noqa: E402
+
+LAZY_MODULES = ("groq", "numpy", "smtplib", "PyPDF2")
+
+
+def parse_importtime(output: str) -> List[Tuple[int, str, int, int]]:
+    """(depth, module, self us, cumulative us) per line of -X importtime output, in print order."""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2][1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((depth, name.strip(), self_us, cumulative_us))
+    return entries
+
+
+def measure_import(env: Dict[str, str]) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """Import time of main in ms, its direct imports by cumulative ms, and the lazy modules it loaded."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    entries = parse_importtime(process.stderr)
+    main_index = next(i for i, entry in enumerate(entries) if entry[0] == 0 and entry[1] == "main")
+    # Children are printed before their parent, so main's imports are the depth 1 lines above it
+    children = []
+    for depth, name, _, cumulative_us in reversed(entries[:main_index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative_us / 1000))
+    imported = {name.split(".")[0] for depth, name, _, _ in entries[:main_index + 1]}
+    return entries[main_index][3] / 1000, sorted(children, key=lambda child: -child[1]), \
+        [module for module in LAZY_MODULES if module in imported]
+
+
+def measure_ready(env: Dict[str, str], port: int) -> float:
+    """Seconds from spawning a uvicorn worker against the fake upstreams to its first 200 on /ready."""
+    services = FakeServices(candidates=500, postings=5, resume_pages=2, duplicate_rate=0.0,
+                            config=FakeServiceConfig(), seed=1).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+            env = dict(env, **services.app_env())
+            for name in ("RESUME_CACHE_DIR", "ASSESSMENT_CACHE_PATH", "SCORING_JOB_DB_PATH", "DISPATCH_DB_PATH",
+                         "RESULTS_DB_PATH"):
+                env[name] = os.path.join(workdir, name.lower())
+            started = time.perf_counter()
+            api = start_api(env, port, 1, os.path.join(workdir, "api.log"))
+            elapsed = time.perf_counter() - started
+            api.terminate()
+            api.wait(timeout=30)
+            return elapsed
+    finally:
+        services.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=750.0, help="maximum median import time of main")
+    parser.add_argument("--top", type=int, default=10, help="number of direct imports to list")
+    parser.add_argument("--ready", action="store_true", help="also measure spawn-to-ready of a uvicorn worker")
+    parser.add_argument("--api-port", type=int, default=8011)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "bench-key")
+    # The first run also writes the bytecode caches, so it is not counted
+    measure_import(env)
+    runs = [measure_import(env) for _ in range(args.runs)]
+    median_ms = statistics.median(total for total, _, _ in runs)
+    _, children, eager = runs[-1]
+
+    print(f"import main: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"{'module':<30}{'cumulative ms':>15}")
+    for name, cumulative_ms in children[:args.top]:
+        print(f"{name:<30}{cumulative_ms:>15.1f}")
+    if args.ready:
+        print(f"\nspawn to ready: {measure_ready(env, args.api_port):.2f} s")
+
+    failed = False
+    if eager:
+        print(f"\nImported eagerly, should be lazy: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"\nOver budget by {median_ms - args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
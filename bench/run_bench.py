@@ -0,0 +1,302 @@
+"""Offline throughput/latency benchmark for main.py.
+
+Starts the fake upstreams from fake_services.py, launches the API under uvicorn pointed at
+them (with fresh caches in a temp directory), then drives /match and
+/generate-calendly-link-send-email at the requested concurrency, sends one bulk
+/shortlist/dispatch, and prints latency percentiles, requests/sec and a per-stage
+breakdown of upstream time.
+
+    python bench/run_bench.py --match-requests 50 --concurrency 5 --llm-latency 0.3
+    python bench/run_bench.py --json bench_output.json   # also write the raw numbers
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_services import FakeServiceConfig, FakeServices  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: List[float], errors: int = 0, wall_seconds: float = None) -> Dict:
+    summary = {
+        "count": len(samples),
+        "errors": errors,
+        "mean_ms": round(1000 * sum(samples) / len(samples), 2) if samples else 0.0,
+        "p50_ms": round(1000 * percentile(samples, 50), 2),
+        "p95_ms": round(1000 * percentile(samples, 95), 2),
+        "p99_ms": round(1000 * percentile(samples, 99), 2),
+        "max_ms": round(1000 * max(samples), 2) if samples else 0.0,
+    }
+    if wall_seconds:
+        summary["requests_per_second"] = round(len(samples) / wall_seconds, 2)
+    return summary
+
+
+def start_api(env: Dict[str, str], port: int, workers: int, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited during startup, see {log_path}")
+        try:
+            # /ready answers 200 once the warm-up (snapshot, indexes, connections) is done
+            if requests.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"API did not become ready within 60s, see {log_path}")
+
+
+def drive(name: str, total: int, concurrency: int, make_request: Callable[[int], requests.Response]) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            ok = make_request(i).status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+    summary = summarize(latencies, errors, wall)
+    summary["endpoint"] = name
+    return summary
+
+
+def parse_stage_metrics(text: str) -> Dict[str, Dict]:
+    """Per-stage totals from the API's candidate_matcher_stage_seconds histogram."""
+    stages: Dict[str, Dict] = {}
+    pattern = re.compile(r'^candidate_matcher_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+    for line in text.splitlines():
+        match = pattern.match(line)
+        if match:
+            kind, stage, value = match.groups()
+            stages.setdefault(stage, {})[kind] = float(value)
+    return {
+        stage: {
+            "count": int(values.get("count", 0)),
+            "total_seconds": round(values.get("sum", 0.0), 3),
+            "mean_ms": round(1000 * values.get("sum", 0.0) / values["count"], 2) if values.get("count") else 0.0,
+        }
+        for stage, values in stages.items()
+    }
+
+
+def print_report(endpoints: List[Dict], stages: Dict[str, Dict], api_stages: Dict[str, Dict], emails_received: int):
+    print()
+    print(f"{'endpoint':<40} {'n':>5} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for row in endpoints:
+        print(f"{row['endpoint']:<40} {row['count']:>5} {row['errors']:>4} {row.get('requests_per_second', 0):>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+    print()
+    print("Upstream stages (time spent inside the fake services)")
+    print(f"{'stage':<20} {'calls':>6} {'err':>4} {'total s':>9} {'mean ms':>9} {'p95 ms':>9}")
+    for stage, row in sorted(stages.items()):
+        print(f"{stage:<20} {row['count']:>6} {row['errors']:>4} {row['total_seconds']:>9} "
+              f"{row['mean_ms']:>9} {row['p95_ms']:>9}")
+    if api_stages:
+        print()
+        print("API stages (from /metrics)")
+        print(f"{'stage':<20} {'calls':>6} {'total s':>9} {'mean ms':>9}")
+        for stage, row in sorted(api_stages.items()):
+            print(f"{stage:<20} {row['count']:>6} {row['total_seconds']:>9} {row['mean_ms']:>9}")
+    print()
+    print(f"Emails received by the SMTP sink: {emails_received}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--match-requests", type=int, default=30)
+    parser.add_argument("--email-requests", type=int, default=30)
+    parser.add_argument("--shortlist-size", type=int, default=50,
+                        help="candidates in the single bulk /shortlist/dispatch request (0 to skip)")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--model", default="gemma2-9b-it")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch", action="store_true", help="use batched multi-candidate prompts")
+    parser.add_argument("--cascade", action="store_true",
+                        help="triage with --model and re-score close calls with --escalation-model")
+    parser.add_argument("--escalation-model", default="qwen-2.5-32b")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="per-request /match time budget in seconds, unscored candidates are cancelled")
+    parser.add_argument("--bypass-cache", action="store_true", help="force a fresh LLM call for every candidate")
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--postings", type=int, default=5)
+    parser.add_argument("--resume-pages", type=int, default=2)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-token-latency", type=float, default=0.002, help="seconds per generated output token")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rpm", type=int, default=0,
+                        help="requests per minute the fake LLM accepts before answering 429 (0 = unlimited); "
+                             "the API is configured with the same limit")
+    parser.add_argument("--resume-latency", type=float, default=0.02)
+    parser.add_argument("--data-latency", type=float, default=0.05)
+    parser.add_argument("--calendly-latency", type=float, default=0.05)
+    parser.add_argument("--smtp-latency", type=float, default=0.01)
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--api-workers", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the API process, e.g. --env MATCH_CONCURRENCY=20")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config = FakeServiceConfig(
+        llm_latency=args.llm_latency, llm_jitter=args.llm_jitter, llm_error_rate=args.llm_error_rate, llm_rpm=args.llm_rpm,
+        llm_token_latency=args.llm_token_latency,
+        resume_latency=args.resume_latency, data_latency=args.data_latency,
+        calendly_latency=args.calendly_latency, smtp_latency=args.smtp_latency, seed=args.seed,
+    )
+    services = FakeServices(candidates=args.candidates, postings=args.postings, resume_pages=args.resume_pages,
+                            duplicate_rate=args.duplicate_rate, config=config, seed=args.seed).start()
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        env = dict(os.environ)
+        env.update(services.app_env())
+        env.update({
+            "RESUME_CACHE_DIR": os.path.join(workdir, "resumes"),
+            "ASSESSMENT_CACHE_PATH": os.path.join(workdir, "assessments.sqlite3"),
+            "SCORING_JOB_DB_PATH": os.path.join(workdir, "scoring_jobs.sqlite3"),
+            "DISPATCH_DB_PATH": os.path.join(workdir, "dispatch.sqlite3"),
+            "RESULTS_DB_PATH": os.path.join(workdir, "results.sqlite3"),
+            # The fake LLM has no token limit; without --llm-rpm it has no request limit either
+            "LLM_RATE_LIMITS": json.dumps({
+                model: {"rpm": args.llm_rpm or 1000000, "tpm": 1000000000} for model in (args.model, args.escalation_model)
+            }),
+        })
+        for item in args.env:
+            key, _, value = item.partition("=")
+            env[key] = value
+
+        api = start_api(env, args.api_port, args.api_workers, os.path.join(workdir, "api.log"))
+        base = f"http://127.0.0.1:{args.api_port}"
+        session_local = threading.local()
+
+        def session() -> requests.Session:
+            if not hasattr(session_local, "session"):
+                session_local.session = requests.Session()
+            return session_local.session
+
+        postings = services.world.postings
+        candidates = services.world.candidates
+
+        def match_request(i: int) -> requests.Response:
+            return session().post(f"{base}/match", json={
+                "job_id": postings[i % len(postings)]["id"],
+                "model_name": args.model,
+                "top_k": args.top_k,
+                "batch": args.batch,
+                "bypass_cache": args.bypass_cache,
+                "cascade": args.cascade,
+                "escalation_model": args.escalation_model,
+                "time_budget": args.time_budget,
+            }, timeout=600)
+
+        def email_request(i: int) -> requests.Response:
+            candidate = candidates[i % len(candidates)]
+            return session().post(f"{base}/generate-calendly-link-send-email", json={
+                "candidate_id": candidate["id"],
+                "candidate_name": candidate["name"],
+                "candidate_email": candidate["emails"][0],
+                "job_title": postings[i % len(postings)]["text"],
+            }, timeout=120)
+
+        def shortlist_request(i: int) -> requests.Response:
+            shortlist = candidates[:args.shortlist_size]
+            return session().post(f"{base}/shortlist/dispatch", json={"candidates": [
+                {
+                    "candidate_id": candidate["id"],
+                    "candidate_name": candidate["name"],
+                    "candidate_email": candidate["emails"][0],
+                    "job_title": postings[0]["text"],
+                }
+                for candidate in shortlist
+            ]}, timeout=600)
+
+        try:
+            endpoints = []
+            services.recorder.reset()
+            if args.match_requests:
+                print(f"Driving /match: {args.match_requests} requests at concurrency {args.concurrency}...")
+                endpoints.append(drive("/match", args.match_requests, args.concurrency, match_request))
+            if args.email_requests:
+                print(f"Driving /generate-calendly-link-send-email: {args.email_requests} requests...")
+                endpoints.append(drive("/generate-calendly-link-send-email", args.email_requests,
+                                       args.concurrency, email_request))
+            if args.shortlist_size:
+                print(f"Dispatching a shortlist of {args.shortlist_size} candidates...")
+                endpoints.append(drive("/shortlist/dispatch", 1, 1, shortlist_request))
+            api_stats = requests.get(f"{base}/stats", timeout=10).json()
+            metrics_response = requests.get(f"{base}/metrics", timeout=10)
+            api_stages = parse_stage_metrics(metrics_response.text) if metrics_response.ok else {}
+        finally:
+            api.terminate()
+            api.wait(timeout=30)
+            services.stop()
+
+    stages = {}
+    for stage, data in services.recorder.snapshot().items():
+        row = summarize(data["samples"], data["errors"])
+        row["total_seconds"] = round(sum(data["samples"]), 3)
+        stages[stage] = row
+
+    print_report(endpoints, stages, api_stages, len(services.inbox))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "args": vars(args),
+                "endpoints": endpoints,
+                "stages": stages,
+                "api_stages": api_stages,
+                "emails_received": len(services.inbox),
+                "api_stats": api_stats,
+            }, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from lazy_imports import lazy_import
+from snapshot_index import SnapshotIndex
+
+np = lazy_import("numpy")
+
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on",
+    "or", "our", "that", "the", "to", "we", "will", "with", "you", "your",
+}
+
+# Term frequency multiplier per candidate field, so a tag or headline hit counts more than a
+# passing mention somewhere in the resume.
+FIELD_WEIGHTS = {"headline": 3, "tags": 3, "location": 1, "resume": 1}
+
+
+def tokenize(text: str) -> List[str]:
+    text = HTML_TAG_RE.sub(" ", text or "").lower()
+    return [token for token in TOKEN_RE.findall(text) if token not in STOPWORDS and len(token) > 1]
+
+
+def candidate_fields(candidate: Dict) -> Dict[str, str]:
+    return {
+        "headline": candidate.get("headline") or "",
+        "tags": " ".join(candidate.get("tags") or []),
+        "location": f"{candidate.get('location') or ''} {candidate.get('opportunityLocation') or ''}",
+    }
+
+
+def posting_query(posting: Dict) -> Counter:
+    """Weighted query terms from a posting's title, tags, requirement lists and location."""
+    categories = posting.get("categories") or {}
+    content = posting.get("content") or {}
+    query = Counter()
+    for token in tokenize(posting.get("text", "")):
+        query[token] += 2
+    for tag in posting.get("tags") or []:
+        for token in tokenize(tag):
+            query[token] += 2
+    for lst in content.get("lists") or []:
+        query.update(tokenize(f"{lst.get('text', '')} {lst.get('content', '')}"))
+    locations = [categories.get("location") or ""] + list(categories.get("allLocations") or [])
+    query.update(tokenize(" ".join(locations + [posting.get("country") or ""])))
+    return query
+
+
+class CandidateIndex(SnapshotIndex):
+    """In-process BM25 inverted index over candidate profiles and cached resume text.
+
+    Postings are kept as per-term lists and converted to NumPy arrays lazily, so a query is a
+    handful of vectorized scatter-adds over the matching documents rather than a Python loop
+    over candidates. Updated candidates get a new document slot and the old one is masked out;
+    the index compacts itself once too many slots are dead.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        super().__init__()
+
+    def _reset(self):
+        super()._reset()
+        self._slot_ids: List[str] = []
+        self._alive: List[bool] = []
+        self._doc_len: List[int] = []
+        self._slot_by_id: Dict[str, int] = {}
+        self._fields: Dict[str, Dict[str, str]] = {}
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._term_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._alive_array: Optional[np.ndarray] = None
+        self._doc_len_array: Optional[np.ndarray] = None
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def _add_document(self, candidate_id: str):
+        term_counts = Counter()
+        fields = dict(self._fields[candidate_id], resume=self._resumes.get(candidate_id, ""))
+        for field, text in fields.items():
+            for token in tokenize(text):
+                term_counts[token] += FIELD_WEIGHTS[field]
+
+        slot = len(self._slot_ids)
+        self._slot_ids.append(candidate_id)
+        self._alive.append(True)
+        self._doc_len.append(sum(term_counts.values()))
+        self._slot_by_id[candidate_id] = slot
+        for term, tf in term_counts.items():
+            docs, tfs = self._postings.setdefault(term, ([], []))
+            docs.append(slot)
+            tfs.append(tf)
+            self._term_arrays.pop(term, None)
+        self._alive_array = None
+        self._doc_len_array = None
+
+    def _kill_slot(self, candidate_id: str):
+        slot = self._slot_by_id.pop(candidate_id, None)
+        if slot is not None:
+            self._alive[slot] = False
+            self._alive_array = None
+            self._dead += 1
+
+    def _indexed_fields(self, candidate: Dict) -> Dict[str, str]:
+        return candidate_fields(candidate)
+
+    def _add(self, candidate_id: str, candidate: Dict, fields: Dict[str, str]):
+        self._fields[candidate_id] = fields
+        self._add_document(candidate_id)
+
+    def _drop(self, candidate_id: str):
+        self._kill_slot(candidate_id)
+
+    def _forget(self, candidate_id: str):
+        self._fields.pop(candidate_id, None)
+
+    def _resume_attached(self, candidate_id: str, had_resume: bool):
+        self._kill_slot(candidate_id)
+        self._add_document(candidate_id)
+
+    def _synced(self):
+        if self._dead > len(self._slot_by_id):
+            self._compact()
+
+    def _compact(self):
+        fields, resumes, fingerprints = self._fields, self._resumes, self._fingerprints
+        self._reset()
+        self._fields, self._resumes, self._fingerprints = fields, resumes, fingerprints
+        for candidate_id in fields:
+            self._add_document(candidate_id)
+
+    def _arrays_for(self, term: str) -> "Optional[Tuple[np.ndarray, np.ndarray]]":
+        arrays = self._term_arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if postings is None:
+                return None
+            arrays = (np.asarray(postings[0], dtype=np.int64), np.asarray(postings[1], dtype=np.float64))
+            self._term_arrays[term] = arrays
+        return arrays
+
+    def top_k(self, query: Counter, k: int) -> List[Tuple[str, float]]:
+        """Returns up to k (candidate_id, score) pairs, best first."""
+        with self._lock:
+            n_slots = len(self._slot_ids)
+            n_docs = len(self._slot_by_id)
+            if not n_docs or k <= 0:
+                return []
+            if self._alive_array is None:
+                self._alive_array = np.asarray(self._alive, dtype=bool)
+            if self._doc_len_array is None:
+                self._doc_len_array = np.asarray(self._doc_len, dtype=np.float64)
+            alive = self._alive_array
+            doc_len = self._doc_len_array
+            avg_len = float(doc_len[alive].mean()) or 1.0
+
+            scores = np.zeros(n_slots, dtype=np.float64)
+            for term, query_tf in query.items():
+                arrays = self._arrays_for(term)
+                if arrays is None:
+                    continue
+                docs, tfs = arrays
+                df = int(alive[docs].sum())
+                if not df:
+                    continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                norm = tfs + self.k1 * (1 - self.b + self.b * doc_len[docs] / avg_len)
+                # Each slot appears once per term, so plain fancy-index addition is safe
+                scores[docs] += query_tf * idf * tfs * (self.k1 + 1) / norm
+
+            scores[~alive] = -np.inf
+            k = min(k, n_docs)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._slot_ids[slot], float(scores[slot])) for slot in top]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "candidates": len(self._slot_by_id),
+                "with_resume_text": len(self._resumes),
+                "terms": len(self._postings),
+                "dead_slots": self._dead,
+                "version": self.version,
+            }
@@ -0,0 +1,124 @@
+import math
+import random
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class CascadePolicy:
+    """Decides which triage results are re-scored by the larger model.
+
+    Scores inside [band_low, band_high] are close calls and always escalate, and so do failed
+    triage assessments. audit_rate escalates that share of the clear-cut scores as well, so
+    the calibration statistics also cover the scores the cascade does not re-check.
+    """
+
+    def __init__(self, triage_model: str, escalation_model: str, band_low: float, band_high: float,
+                 audit_rate: float = 0.0):
+        self.triage_model = triage_model
+        self.escalation_model = escalation_model
+        self.band_low = band_low
+        self.band_high = band_high
+        self.audit_rate = audit_rate
+
+    def escalation_reason(self, score: Optional[float]) -> Optional[str]:
+        if score is None:
+            return "error"
+        if self.band_low <= score <= self.band_high:
+            return "band"
+        if self.audit_rate and random.random() < self.audit_rate:
+            return "audit"
+        return None
+
+
+class TierPair:
+    # Running sums for a least-squares fit of escalation score on triage score
+    def __init__(self):
+        self.triaged = 0
+        self.escalated = {"band": 0, "error": 0, "audit": 0}
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_yy = 0.0
+        self.sum_xy = 0.0
+        self.sum_abs_diff = 0.0
+        self.sum_abs_diff_audit = 0.0
+        self.audits = 0
+
+
+class CascadeCalibration:
+    """How the triage model's scores compare with the escalation model's on the same candidates.
+
+    Per (triage, escalation) model pair: how many candidates were triaged and escalated (by
+    reason), the mean and mean absolute difference between the two scores, their correlation
+    and a linear fit mapping triage scores onto the larger model's scale. Audited escalations
+    are also reported on their own, as an estimate of what the band lets through unchecked.
+    """
+
+    def __init__(self):
+        self._pairs: Dict[Tuple[str, str], TierPair] = {}
+        self._lock = threading.Lock()
+
+    def _pair(self, policy: CascadePolicy) -> TierPair:
+        key = (policy.triage_model, policy.escalation_model)
+        pair = self._pairs.get(key)
+        if pair is None:
+            pair = self._pairs[key] = TierPair()
+        return pair
+
+    def record_triage(self, policy: CascadePolicy, count: int):
+        with self._lock:
+            self._pair(policy).triaged += count
+
+    def record_escalation(self, policy: CascadePolicy, reason: str, triage_score: Optional[float],
+                          final_score: Optional[float], calibrate: bool = True):
+        """Counts the escalation; calibrate=False leaves the score pair out of the regression."""
+        with self._lock:
+            pair = self._pair(policy)
+            pair.escalated[reason] += 1
+            if not calibrate or triage_score is None or final_score is None:
+                return
+            pair.n += 1
+            pair.sum_x += triage_score
+            pair.sum_y += final_score
+            pair.sum_xx += triage_score * triage_score
+            pair.sum_yy += final_score * final_score
+            pair.sum_xy += triage_score * final_score
+            pair.sum_abs_diff += abs(final_score - triage_score)
+            if reason == "audit":
+                pair.audits += 1
+                pair.sum_abs_diff_audit += abs(final_score - triage_score)
+
+    @staticmethod
+    def _summary(pair: TierPair) -> Dict:
+        summary = {
+            "triaged": pair.triaged,
+            "escalated": dict(pair.escalated),
+            "escalation_rate": round(sum(pair.escalated.values()) / pair.triaged, 4) if pair.triaged else None,
+            "compared": pair.n,
+            "mean_diff": None,
+            "mean_abs_diff": None,
+            "correlation": None,
+            "slope": None,
+            "intercept": None,
+            "audit_mean_abs_diff": round(pair.sum_abs_diff_audit / pair.audits, 3) if pair.audits else None,
+        }
+        if not pair.n:
+            return summary
+        n = pair.n
+        summary["mean_diff"] = round((pair.sum_y - pair.sum_x) / n, 3)
+        summary["mean_abs_diff"] = round(pair.sum_abs_diff / n, 3)
+        var_x = pair.sum_xx - pair.sum_x * pair.sum_x / n
+        var_y = pair.sum_yy - pair.sum_y * pair.sum_y / n
+        cov = pair.sum_xy - pair.sum_x * pair.sum_y / n
+        if var_x > 0:
+            slope = cov / var_x
+            summary["slope"] = round(slope, 4)
+            summary["intercept"] = round((pair.sum_y - slope * pair.sum_x) / n, 3)
+            if var_y > 0:
+                summary["correlation"] = round(cov / math.sqrt(var_x * var_y), 4)
+        return summary
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {f"{triage} -> {escalation}": self._summary(pair) for (triage, escalation), pair in self._pairs.items()}
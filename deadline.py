@@ -0,0 +1,84 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# How often blocking waits wake up to notice a cancelled request
+POLL_INTERVAL = 0.25
+
+
+class Cancelled(Exception):
+    """Raised inside work whose request ran out of time or was abandoned by the client."""
+
+
+class Deadline:
+    """Time budget of one request, which can also be cancelled early.
+
+    Work started for the request (in worker threads too, since asyncio.to_thread copies the
+    context) calls check_deadline() between steps and caps its network timeouts with
+    remaining_timeout(), so it stops soon after the request no longer wants the answer.
+    """
+
+    def __init__(self, budget: Optional[float] = None):
+        self.expires_at = time.monotonic() + budget if budget else None
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def cancel(self, reason: str):
+        if self.reason is None:
+            self.reason = reason
+        self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        if self._cancelled.is_set():
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            if self.reason is None:
+                self.reason = "time_budget"
+            return True
+        return False
+
+    def check(self):
+        if self.expired():
+            raise Cancelled(self.reason)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check_deadline():
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def remaining_timeout(timeout: float) -> float:
+    """timeout, shortened to what is left of the current request's budget."""
+    deadline = _current.get()
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        deadline.check()
+    return min(timeout, remaining)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Makes deadline the current one for the block, and for tasks and threads started in it."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
@@ -0,0 +1,245 @@
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from candidate_index import tokenize
+from lazy_imports import lazy_import
+from snapshot_index import SnapshotIndex
+
+np = lazy_import("numpy")
+
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_SIZE = 3
+# Fuzzy matches need enough features to be meaningful, a bare headline is not a person
+MIN_FUZZY_FEATURES = 10
+
+
+def normalize_email(email: str) -> str:
+    local, _, domain = (email or "").strip().lower().partition("@")
+    return f"{local.split('+', 1)[0]}@{domain}" if domain else local
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(sorted(tokenize(name or "")))
+
+
+def candidate_features(candidate: Dict, resume_text: Optional[str]) -> Set[str]:
+    """Emails, name, headline terms and word shingles of the resume, as one feature set."""
+    features = {f"email:{normalize_email(email)}" for email in candidate.get("emails") or [] if email}
+    name = normalize_name(candidate.get("name"))
+    if name:
+        features.add(f"name:{name}")
+    features.update(f"headline:{token}" for token in tokenize(candidate.get("headline") or ""))
+    words = tokenize(resume_text or "")
+    features.update(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(0, len(words) - SHINGLE_SIZE + 1)))
+    return features
+
+
+def exact_keys(candidate: Dict) -> Set[str]:
+    # Records sharing any of these are the same person regardless of the rest of the profile
+    keys = {f"email:{normalize_email(email)}" for email in candidate.get("emails") or [] if email}
+    if candidate.get("resume_url"):
+        keys.add(f"resume:{candidate['resume_url']}")
+    return keys
+
+
+class DuplicateIndex(SnapshotIndex):
+    """MinHash/LSH index that groups candidate records describing the same person.
+
+    Records sharing a normalized email or resume URL are linked directly. Otherwise each
+    record's feature set (name, headline terms, resume shingles) gets a MinHash signature
+    whose bands are bucketed, so only records colliding in at least one band are compared,
+    and a pair is linked when its estimated Jaccard similarity reaches the threshold. Adding
+    a record, or attaching a resume to a record that had none, only touches its own buckets
+    and merges the member lists of the clusters it joins; removals and changes rebuild the
+    clusters from the stored buckets on the next lookup.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.7, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.seed = seed
+        self._permutations: Optional[Tuple] = None
+        super().__init__()
+
+    def _reset(self):
+        super()._reset()
+        self._candidates: Dict[str, Dict] = {}
+        self._signatures: Dict[str, Optional[np.ndarray]] = {}
+        self._names: Dict[str, str] = {}
+        self._keys: Dict[str, Set[str]] = {}
+        self._buckets: Dict[Tuple, Set[str]] = defaultdict(set)
+        self._parent: Dict[str, str] = {}
+        # Cluster root -> member ids, for clusters with more than one member
+        self._members: Dict[str, Set[str]] = {}
+        self._dirty = False
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def _hash_params(self) -> Tuple:
+        # Drawn on first use, so building the index doesn't import numpy
+        if self._permutations is None:
+            rng = np.random.RandomState(self.seed)
+            self._permutations = (rng.randint(1, MERSENNE_PRIME, size=self.num_perm).astype(np.uint64),
+                                  rng.randint(0, MERSENNE_PRIME, size=self.num_perm).astype(np.uint64))
+        return self._permutations
+
+    def _signature(self, features: Set[str]) -> "Optional[np.ndarray]":
+        if len(features) < MIN_FUZZY_FEATURES:
+            return None
+        a, b = self._hash_params()
+        hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint64, count=len(features))
+        # (a * x + b) mod p for every permutation at once; a, x < 2^32 so nothing overflows
+        return ((np.outer(a, hashes) + b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, candidate_id: str) -> List[Tuple]:
+        return [("exact", key) for key in self._keys[candidate_id]] + self._fuzzy_keys(candidate_id)
+
+    def _fuzzy_keys(self, candidate_id: str) -> List[Tuple]:
+        signature = self._signatures[candidate_id]
+        if signature is None:
+            return []
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _find(self, candidate_id: str) -> str:
+        root = candidate_id
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[candidate_id] != root:
+            self._parent[candidate_id], candidate_id = root, self._parent[candidate_id]
+        return root
+
+    def _union(self, first: str, second: str):
+        first, second = self._find(first), self._find(second)
+        if first != second:
+            # The lexically smallest id is the root, so cluster roots don't depend on insertion order
+            if second < first:
+                first, second = second, first
+            self._parent[second] = first
+            self._members.setdefault(first, {first}).update(self._members.pop(second, {second}))
+
+    def _similar(self, first: str, second: str) -> bool:
+        first_sig, second_sig = self._signatures[first], self._signatures[second]
+        if first_sig is None or second_sig is None:
+            return False
+        # Same resume text under a different name is a template, not the same person
+        first_name, second_name = self._names[first], self._names[second]
+        if first_name and second_name and not set(first_name.split()) & set(second_name.split()):
+            return False
+        return float(np.mean(first_sig == second_sig)) >= self.threshold
+
+    def _link(self, candidate_id: str, keys: List[Tuple]):
+        self._parent.setdefault(candidate_id, candidate_id)
+        for key in keys:
+            bucket = self._buckets[key]
+            for other in bucket:
+                if key[0] == "exact" or self._similar(candidate_id, other):
+                    self._union(candidate_id, other)
+            bucket.add(candidate_id)
+
+    def _unlink(self, candidate_id: str):
+        for key in self._band_keys(candidate_id):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(candidate_id)
+                if not bucket:
+                    del self._buckets[key]
+        # Union-find can't split clusters, rebuild them lazily
+        self._dirty = True
+
+    def _index(self, candidate_id: str):
+        candidate = self._candidates[candidate_id]
+        self._keys[candidate_id] = exact_keys(candidate)
+        self._names[candidate_id] = normalize_name(candidate.get("name"))
+        self._signatures[candidate_id] = self._signature(candidate_features(candidate, self._resumes.get(candidate_id)))
+        self._parent[candidate_id] = candidate_id
+        self._add_keys(candidate_id, self._band_keys(candidate_id))
+
+    def _add_keys(self, candidate_id: str, keys: List[Tuple]):
+        if self._dirty:
+            # The pending rebuild links them
+            for key in keys:
+                self._buckets[key].add(candidate_id)
+        else:
+            self._link(candidate_id, keys)
+
+    def _rebuild(self):
+        self._parent = {candidate_id: candidate_id for candidate_id in self._candidates}
+        self._members = {}
+        for key, bucket in self._buckets.items():
+            members = sorted(bucket)
+            if key[0] == "exact":
+                for candidate_id in members[1:]:
+                    self._union(members[0], candidate_id)
+                continue
+            for i, candidate_id in enumerate(members):
+                for other in members[:i]:
+                    if self._find(candidate_id) != self._find(other) and self._similar(candidate_id, other):
+                        self._union(candidate_id, other)
+        self._dirty = False
+        self.rebuilds += 1
+
+    def _indexed_fields(self, candidate: Dict) -> Dict:
+        return {field: candidate.get(field) for field in ("name", "emails", "headline", "resume_url")}
+
+    def _add(self, candidate_id: str, candidate: Dict, fields: Dict):
+        self._candidates[candidate_id] = candidate
+        self._index(candidate_id)
+
+    def _drop(self, candidate_id: str):
+        self._unlink(candidate_id)
+
+    def _forget(self, candidate_id: str):
+        for store in (self._candidates, self._signatures, self._names, self._keys, self._parent):
+            store.pop(candidate_id, None)
+
+    def _resume_attached(self, candidate_id: str, had_resume: bool):
+        if not had_resume and self._signatures[candidate_id] is None:
+            # The record had no fuzzy buckets, so it only gains some: no link to undo, no rebuild
+            features = candidate_features(self._candidates[candidate_id], self._resumes[candidate_id])
+            self._signatures[candidate_id] = self._signature(features)
+            self._add_keys(candidate_id, self._fuzzy_keys(candidate_id))
+            return
+        self._unlink(candidate_id)
+        self._index(candidate_id)
+
+    def cluster_id(self, candidate_id: str) -> str:
+        """Id shared by every record of the same person (the candidate's own id if it is unknown)."""
+        with self._lock:
+            if candidate_id not in self._parent:
+                return candidate_id
+            if self._dirty:
+                self._rebuild()
+            return self._find(candidate_id)
+
+    def clusters(self) -> Dict[str, List[str]]:
+        """Cluster id -> member ids, for every cluster with more than one member."""
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            return {cluster: sorted(members) for cluster, members in self._members.items()}
+
+    def members(self, candidate_id: str) -> List[str]:
+        """Every record of the candidate's cluster, the candidate included."""
+        with self._lock:
+            members = self._members.get(self.cluster_id(candidate_id))
+            return sorted(members) if members else [candidate_id]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            clusters = self.clusters()
+            duplicates = sum(len(members) - 1 for members in clusters.values())
+            return {
+                "candidates": len(self._candidates),
+                "duplicate_clusters": len(clusters),
+                "duplicates": duplicates,
+                "largest_cluster": max((len(members) for members in clusters.values()), default=1),
+                "rebuilds": self.rebuilds,
+                "version": self.version,
+            }
@@ -0,0 +1,184 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from email.message import Message
+from typing import Dict, Optional, Tuple
+
+from lazy_imports import lazy_import
+
+# Only workers that actually send email pay for the import
+smtplib = lazy_import("smtplib")
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """4xx replies and dropped connections are worth retrying, 5xx replies are not."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    # SMTPServerDisconnected, SMTPConnectError, socket timeouts and resets are all OSErrors
+    return isinstance(error, OSError)
+
+
+class SmtpPool:
+    """A few authenticated SMTP sessions reused across messages.
+
+    Sessions are connected, upgraded with STARTTLS and logged in once, then handed out to
+    senders; at most `size` are open at a time. Sessions idle for longer than max_idle are
+    closed instead of reused, and a session the server dropped is reconnected once.
+    """
+
+    def __init__(self, host: str, port: int, starttls: bool, username: Optional[str], password: Optional[str],
+                 size: int, timeout: float, max_idle: float):
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._slots = threading.BoundedSemaphore(size)
+        # Most recently used session first, so spare sessions age out
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.sent = 0
+
+    def _connect(self) -> "smtplib.SMTP":
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except BaseException:
+            self._quit(server)
+            raise
+        with self._lock:
+            self.connects += 1
+        return server
+
+    @staticmethod
+    def _quit(server: "smtplib.SMTP"):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self) -> "smtplib.SMTP":
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.time() - last_used <= self.max_idle:
+                return server
+            self._quit(server)
+
+    def send(self, msg: Message):
+        with self._slots:
+            server = self._checkout()
+            try:
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # The server closed an idle session, reconnect and send once more
+                    self._quit(server)
+                    server = self._connect()
+                    server.send_message(msg)
+            except BaseException:
+                # A failed transaction leaves the session in an unknown state
+                self._quit(server)
+                raise
+            self._idle.put((server, time.time()))
+            with self._lock:
+                self.sent += 1
+
+    def close(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(server)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"connects": self.connects, "sent": self.sent, "idle": self._idle.qsize()}
+
+
+class DispatchStore:
+    """SQLite record of shortlist invitations, keyed by an idempotency key.
+
+    A key is claimed before anything is sent; claimed keys that are already sent (or still in
+    flight) are skipped, so retrying a dispatch never emails a candidate twice. The claim is a
+    single conditional upsert, so API workers sharing the database can't both win it. A claim
+    left pending for longer than stale_after (a crash mid-send) can be taken over again.
+    """
+
+    def __init__(self, path: str, stale_after: float):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dispatches (
+                key TEXT PRIMARY KEY,
+                candidate_id TEXT NOT NULL,
+                email TEXT NOT NULL,
+                job_title TEXT NOT NULL,
+                status TEXT NOT NULL,
+                link TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def claim(self, key: str, candidate_id: str, email: str, job_title: str,
+              force: bool = False) -> Tuple[bool, Optional[Dict]]:
+        """Marks the key pending. Returns whether it was claimed, plus the previous record if any
+        (a failed earlier attempt may already have a scheduling link to reuse)."""
+        now = time.time()
+        with self._lock:
+            record = self._record(key)
+            # Only takes the key over when it isn't sent (unless forced) or in flight; a second worker
+            # racing for the same key finds it pending and changes no row
+            claimed = self._conn.execute(
+                "INSERT INTO dispatches (key, candidate_id, email, job_title, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'pending', ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET status = 'pending', error = NULL, updated_at = excluded.updated_at "
+                "WHERE NOT (dispatches.status = 'pending' AND dispatches.updated_at > ?) "
+                "AND (dispatches.status != 'sent' OR ?)",
+                (key, candidate_id, email, job_title, now, now, now - self.stale_after, force),
+            ).rowcount == 1
+            self._conn.commit()
+            if not claimed:
+                return False, self._record(key)
+        return True, record
+
+    def _record(self, key: str) -> Optional[Dict]:
+        cursor = self._conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        row = cursor.execute("SELECT * FROM dispatches WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def finish(self, key: str, status: str, link: Optional[str] = None, error: Optional[str] = None) -> int:
+        """Records the outcome of a claimed dispatch and returns how many attempts the key has had."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE dispatches SET status = ?, link = COALESCE(?, link), error = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                (status, link, error, time.time(), key),
+            )
+            self._conn.commit()
+            return self._conn.execute("SELECT attempts FROM dispatches WHERE key = ?", (key,)).fetchone()[0]
@@ -0,0 +1,136 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from deadline import check_deadline, remaining_timeout
+from metrics import HTTP_RETRIES
+
+logger = logging.getLogger("candidate_matcher.http")
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Failures where the request never reached the server, so retrying is safe for any method
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class HttpClients:
+    """One pooled, keep-alive HTTP client shared by every outbound call of the process.
+
+    Connections are kept per host and reused across requests, every call has a connect and
+    read timeout, and transient failures are retried with jittered exponential backoff
+    (honouring Retry-After). Non-idempotent requests are only retried when they were never
+    sent, unless the caller says the endpoint is safe to repeat.
+    """
+
+    def __init__(self, timeout: float, connect_timeout: float, max_connections: int, max_keepalive: int,
+                 http2: bool, retries: int, backoff_base: float, backoff_max: float):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.http2 = http2
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        http2=self.http2,
+                        timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive,
+                            keepalive_expiry=60,
+                        ),
+                        follow_redirects=True,
+                    )
+        return self._client
+
+    def start(self):
+        """Creates the connection pool; called from the app lifespan startup."""
+        return self.client
+
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent retries against the same host from lining up
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retryable(self, method: str, attempt: int, retry_unsafe: bool,
+                   error: Optional[Exception] = None, response: Optional[httpx.Response] = None) -> bool:
+        if attempt >= self.retries:
+            return False
+        safe = method.upper() in IDEMPOTENT_METHODS or retry_unsafe
+        if error is not None:
+            return isinstance(error, NOT_SENT_ERRORS) or (safe and isinstance(error, httpx.TransportError))
+        return safe and response.status_code in RETRY_STATUSES
+
+    def _timeout(self) -> httpx.Timeout:
+        # Never wait on the network past the deadline of the request this call works for
+        return httpx.Timeout(remaining_timeout(self.timeout), connect=remaining_timeout(self.connect_timeout))
+
+    def _send(self, method: str, url: str, stream: bool, retry_unsafe: bool, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            check_deadline()
+            try:
+                request = self.client.build_request(method, url, timeout=self._timeout(), **kwargs)
+                response = self.client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                # A timeout shortened by the deadline means the request was abandoned, not that the host failed
+                check_deadline()
+                if not self._retryable(method, attempt, retry_unsafe, error=e):
+                    raise
+                delay = self._backoff(attempt)
+                reason = type(e).__name__
+            else:
+                if not self._retryable(method, attempt, retry_unsafe, response=response):
+                    return response
+                delay = self._backoff(attempt, response)
+                reason = str(response.status_code)
+                response.close()
+            host = urlparse(url).netloc
+            HTTP_RETRIES.inc(host=host, reason=reason)
+            logger.info("Retrying %s %s in %.2fs after %s (attempt %d)", method, host, delay, reason, attempt + 1)
+            time.sleep(remaining_timeout(delay))
+            attempt += 1
+
+    def request(self, method: str, url: str, retry_unsafe: bool = False, **kwargs) -> httpx.Response:
+        return self._send(method, url, stream=False, retry_unsafe=retry_unsafe, **kwargs)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, url: str, retry_unsafe: bool = False, **kwargs) -> Iterator[httpx.Response]:
+        """Streams the response body; retries only happen before the body is read."""
+        response = self._send(method, url, stream=True, retry_unsafe=retry_unsafe, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
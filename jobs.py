@@ -0,0 +1,324 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("candidate_matcher.jobs")
+
+
+class ScoringJobStore:
+    """SQLite persistence for bulk scoring jobs and their per-candidate results.
+
+    Every finished chunk is written together with the job's progress counter in one
+    transaction, which is the checkpoint a restarted worker resumes from. A job is run by the
+    worker holding its lease (owner, lease_expires_at); leases are taken and renewed with
+    conditional UPDATEs, so API workers sharing the database never run the same job twice,
+    and a job is only picked up by another worker once its owner stopped renewing.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS scoring_jobs (
+                id TEXT PRIMARY KEY,
+                posting_id TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                options TEXT NOT NULL,
+                candidate_ids TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                processed INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL,
+                owner TEXT,
+                lease_expires_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS scoring_job_results (
+                scoring_job_id TEXT NOT NULL,
+                candidate_id TEXT NOT NULL,
+                name TEXT,
+                email TEXT,
+                score REAL,
+                assessment TEXT,
+                error TEXT,
+                PRIMARY KEY (scoring_job_id, candidate_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_scoring_job_results_score
+                ON scoring_job_results (scoring_job_id, score DESC);
+            """
+        )
+
+    def create(self, posting_id: str, model_name: str, options: Dict, candidate_ids: List[str]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO scoring_jobs (id, posting_id, model_name, options, candidate_ids, status, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, posting_id, model_name, json.dumps(options), json.dumps(candidate_ids), len(candidate_ids), now, now),
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str, with_candidates: bool = False) -> Optional[Dict]:
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            row = cursor.execute("SELECT * FROM scoring_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        candidate_ids = json.loads(job.pop("candidate_ids"))
+        if with_candidates:
+            job["candidate_ids"] = candidate_ids
+        return job
+
+    def claimable(self) -> List[str]:
+        """Unfinished jobs nobody holds a live lease on."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM scoring_jobs WHERE status IN ('queued', 'running') "
+                "AND (owner IS NULL OR lease_expires_at IS NULL OR lease_expires_at < ?) ORDER BY created_at",
+                (time.time(),),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _update(self, sql: str, params) -> bool:
+        with self._lock:
+            updated = self._conn.execute(sql, params).rowcount
+            self._conn.commit()
+        return updated == 1
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Takes the job's lease and marks it running, unless another worker holds a live lease."""
+        now = time.time()
+        return self._update(
+            "UPDATE scoring_jobs SET status = 'running', owner = ?, lease_expires_at = ?, updated_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running') "
+            "AND (owner IS NULL OR owner = ? OR lease_expires_at IS NULL OR lease_expires_at < ?)",
+            (owner, now + lease_seconds, now, job_id, owner, now),
+        )
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extends the lease; False once the job was cancelled or taken over."""
+        return self._update(
+            "UPDATE scoring_jobs SET lease_expires_at = ? WHERE id = ? AND owner = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, owner),
+        )
+
+    def finish(self, job_id: str, owner: str, status: str, error: Optional[str] = None) -> bool:
+        """Ends a job run by owner; a job cancelled meanwhile stays cancelled."""
+        now = time.time()
+        return self._update(
+            "UPDATE scoring_jobs SET status = ?, error = ?, updated_at = ?, finished_at = ?, lease_expires_at = NULL "
+            "WHERE id = ? AND owner = ? AND status = 'running'",
+            (status, error, now, now, job_id, owner),
+        )
+
+    def cancel(self, job_id: str) -> bool:
+        now = time.time()
+        return self._update(
+            "UPDATE scoring_jobs SET status = 'cancelled', updated_at = ?, finished_at = ?, lease_expires_at = NULL "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            (now, now, job_id),
+        )
+
+    def checkpoint(self, job_id: str, owner: str, processed: int, results: List[Dict]) -> bool:
+        """Stores a chunk's results and progress, only while owner still runs the job."""
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE scoring_jobs SET processed = ?, updated_at = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                (processed, time.time(), job_id, owner),
+            ).rowcount
+            if updated:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO scoring_job_results (scoring_job_id, candidate_id, name, email, score, assessment, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (job_id, r["candidate_id"], r.get("name"), r.get("email"), r["score"], r.get("assessment"), r.get("error"))
+                        for r in results
+                    ],
+                )
+            self._conn.commit()
+        return updated == 1
+
+    def results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT candidate_id, name, email, score, assessment, error FROM scoring_job_results "
+                "WHERE scoring_job_id = ? ORDER BY score DESC, candidate_id LIMIT ? OFFSET ?",
+                (job_id, limit, offset),
+            ).fetchall()
+        # Failed assessments have no score and sort last
+        keys = ("candidate_id", "name", "email", "score", "assessment", "error")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def result_count(self, job_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM scoring_job_results WHERE scoring_job_id = ?", (job_id,)
+            ).fetchone()[0]
+
+
+class ScoringJobRunner:
+    """Runs bulk scoring jobs on background threads, chunk by chunk.
+
+    score_chunk(posting, candidates, job) must return one {"score", "assessment", "error"} dict per
+    candidate; load_data() returns the current (postings_by_id, candidates_by_id).
+
+    A heartbeat thread renews the leases of the jobs this process runs and picks up jobs whose
+    owner stopped renewing (a crashed or scaled-down worker). Cancellation is read from the
+    database before every chunk, so a DELETE served by any worker stops the job.
+    """
+
+    def __init__(self, store: ScoringJobStore, score_chunk: Callable, load_data: Callable,
+                 chunk_size: int, workers: int, lease_seconds: float = 60.0):
+        self.store = store
+        self.score_chunk = score_chunk
+        self.load_data = load_data
+        self.chunk_size = chunk_size
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scoring-job")
+        self._lock = threading.Lock()
+        self._active: Dict[str, Dict] = {}
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, posting_id: str, model_name: str, options: Dict, candidate_ids: List[str]) -> str:
+        job_id = self.store.create(posting_id, model_name, options, candidate_ids)
+        self._start(job_id)
+        return job_id
+
+    def resume_pending(self) -> List[str]:
+        """Starts unfinished jobs that no live worker holds (e.g. interrupted by a restart)."""
+        self._start_heartbeat()
+        with self._lock:
+            job_ids = [job_id for job_id in self.store.claimable() if job_id not in self._active]
+        for job_id in job_ids:
+            self._start(job_id)
+        return job_ids
+
+    def cancel(self, job_id: str) -> bool:
+        # The running worker, in this process or another, sees it before its next chunk
+        return self.store.cancel(job_id)
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name="scoring-job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                with self._lock:
+                    running = [job_id for job_id, run in self._active.items() if run["run_started_at"]]
+                for job_id in running:
+                    self.store.renew(job_id, self.owner, self.lease_seconds)
+                resumed = self.resume_pending()
+                if resumed:
+                    logger.info("Took over scoring jobs with expired leases: %s", ", ".join(resumed))
+            except Exception as e:
+                logger.error("Scoring job heartbeat failed: %s", str(e))
+
+    def _start(self, job_id: str):
+        self._start_heartbeat()
+        with self._lock:
+            if job_id in self._active:
+                return
+            self._active[job_id] = {"run_started_at": None, "run_processed": 0}
+        self._executor.submit(self._run, job_id)
+
+    def _owned(self, job_id: str) -> bool:
+        job = self.store.get(job_id)
+        return job is not None and job["status"] == "running" and job["owner"] == self.owner
+
+    def _run(self, job_id: str):
+        try:
+            # Another worker may have claimed the job since it was listed
+            if not self.store.claim(job_id, self.owner, self.lease_seconds):
+                return
+            job = self.store.get(job_id, with_candidates=True)
+            with self._lock:
+                self._active[job_id]["run_started_at"] = time.time()
+            postings_by_id, candidates_by_id = self.load_data()
+            posting = postings_by_id.get(job["posting_id"])
+            if posting is None:
+                self.store.finish(job_id, self.owner, "failed", "Job posting not found")
+                return
+
+            processed = job["processed"]
+            candidate_ids = job["candidate_ids"]
+            while processed < len(candidate_ids):
+                # Stop when the job was cancelled or its lease lost, whichever worker did it
+                if not self._owned(job_id):
+                    logger.info("Scoring job %s stopped: cancelled or taken over", job_id)
+                    return
+                chunk_ids = candidate_ids[processed:processed + self.chunk_size]
+                # Candidates removed from the feed since submission are skipped
+                chunk = [candidates_by_id[cid] for cid in chunk_ids if cid in candidates_by_id]
+                scored = self.score_chunk(posting, chunk, job) if chunk else []
+                results = [
+                    {
+                        "candidate_id": candidate["id"],
+                        "name": candidate.get("name"),
+                        "email": (candidate.get("emails") or [None])[0],
+                        "score": result["score"],
+                        "assessment": result["assessment"],
+                        "error": result.get("error"),
+                    }
+                    for candidate, result in zip(chunk, scored)
+                ]
+                processed += len(chunk_ids)
+                if not self.store.checkpoint(job_id, self.owner, processed, results):
+                    logger.info("Scoring job %s stopped: cancelled or taken over", job_id)
+                    return
+                with self._lock:
+                    self._active[job_id]["run_processed"] += len(chunk_ids)
+
+            self.store.finish(job_id, self.owner, "completed")
+        except Exception as e:
+            logger.error("Scoring job %s failed: %s", job_id, str(e))
+            self.store.finish(job_id, self.owner, "failed", str(e))
+        finally:
+            with self._lock:
+                self._active.pop(job_id, None)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            run = dict(self._active.get(job_id) or {})
+
+        # Throughput and ETA are measured over the current run, so a resumed job isn't
+        # credited with work done before the restart.
+        throughput = None
+        eta_seconds = None
+        if run.get("run_started_at") and run["run_processed"]:
+            elapsed = time.time() - run["run_started_at"]
+            throughput = run["run_processed"] / elapsed if elapsed > 0 else None
+            if throughput:
+                eta_seconds = round((job["total"] - job["processed"]) / throughput, 1)
+
+        job["progress"] = job["processed"] / job["total"] if job["total"] else 1.0
+        job["candidates_per_second"] = round(throughput, 3) if throughput else None
+        job["eta_seconds"] = eta_seconds
+        job["scored"] = self.store.result_count(job_id)
+        return job
@@ -0,0 +1,52 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Dict, List, Optional
+
+
+class LazyModule:
+    """Stands in for a module that is only imported on first attribute access.
+
+    Keeps slow imports (groq, numpy) off the worker's startup path; the warm-up loads them in
+    the background with load_lazy_modules() before the worker reports ready. The import runs
+    under a lock, so threads racing on the first access import it once.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+
+_modules: Dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    module = _modules.get(name)
+    if module is None:
+        module = _modules[name] = LazyModule(name)
+    return module
+
+
+def load_lazy_modules() -> List[str]:
+    """Imports every lazy module not loaded yet and returns their names."""
+    loaded = []
+    for name, module in list(_modules.items()):
+        if not module.loaded:
+            module.load()
+            loaded.append(name)
+    return loaded
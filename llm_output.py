@@ -0,0 +1,161 @@
+import json
+import math
+import re
+from typing import Any, Callable, Dict, Optional
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+CLOSERS = {"{": "}", "[": "]"}
+
+
+class JsonStreamParser:
+    """Finds the first complete JSON value in model output while it is still streaming.
+
+    Text inside <think>...</think> blocks is skipped, and so is anything around the value
+    (code fences, preambles). Brackets inside JSON strings are ignored. With a validate
+    callable, values it returns a falsy result for (e.g. "[1]" in "I rank [1] first") are
+    skipped as well. feed() returns the parsed value as soon as its closing bracket arrives,
+    so the caller can stop reading.
+    """
+
+    def __init__(self, opener: str = "{", validate: Optional[Callable[[Any], Any]] = None):
+        self.opener = opener
+        self.validate = validate
+        self.text = ""
+        self.value: Any = None
+        self.done = False
+        self._pos = 0
+        self._in_think = False
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Any:
+        if self.done:
+            return self.value
+        self.text += chunk
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            if self._in_think:
+                end = text.find(THINK_CLOSE, i)
+                if end == -1:
+                    # Keep enough of the tail to spot a closing tag split across chunks
+                    i = max(i, len(text) - len(THINK_CLOSE) + 1)
+                    break
+                self._in_think = False
+                i = end + len(THINK_CLOSE)
+                continue
+
+            char = text[i]
+            if self._start is None:
+                if char == "<":
+                    if text.startswith(THINK_OPEN, i):
+                        self._in_think = True
+                        i += len(THINK_OPEN)
+                        continue
+                    if THINK_OPEN.startswith(text[i:]):
+                        # Possibly a split <think> tag, wait for more text
+                        break
+                elif char == self.opener:
+                    self._start = i
+                    self._depth = 1
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    start, self._start = self._start, None
+                    try:
+                        value = json.loads(text[start:i + 1])
+                    except ValueError:
+                        # Not JSON after all (e.g. braces in prose), look for the next opener
+                        i = start + 1
+                        continue
+                    if self.validate is not None and not self.validate(value):
+                        # Valid JSON but not the answer, keep looking after it
+                        i += 1
+                        continue
+                    self.value = value
+                    self.done = True
+                    self._pos = i + 1
+                    return self.value
+            i += 1
+        self._pos = i
+        return None
+
+
+class Usage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = prompt_tokens + completion_tokens
+
+
+class LlmReply:
+    """Raw text, parsed JSON value (None if none was found) and token usage of one completion.
+    early_stop is set when the stream was closed as soon as the value was complete."""
+
+    def __init__(self, text: str, value: Any, usage: Optional[object], early_stop: bool = False):
+        self.text = text
+        self.value = value
+        self.usage = usage
+        self.early_stop = early_stop
+
+
+SCORE_STRING = re.compile(r"\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)\s*(?:/\s*100\s*)?")
+
+
+def normalize_score(value) -> Optional[float]:
+    # Numbers (or strings like "85" or "85/100") clamped to 0-100; anything else is invalid
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        match = SCORE_STRING.fullmatch(value)
+        if not match:
+            return None
+        value = float(match.group(1))
+    if not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return float(min(100.0, max(0.0, value)))
+
+
+def validate_assessment(value) -> Optional[Dict]:
+    """A clean {"score", "assessment"} dict, or None if the model's answer doesn't fit the schema."""
+    if not isinstance(value, dict):
+        return None
+    score = normalize_score(value.get("score"))
+    assessment = value.get("assessment")
+    if score is None or not isinstance(assessment, str) or not assessment.strip():
+        return None
+    return {"score": score, "assessment": assessment.strip()}
+
+
+def validate_batch_entries(entries, candidate_ids: set) -> Dict[str, Dict]:
+    # Keep only well-formed entries for candidates that were actually in the batch
+    valid = {}
+    if not isinstance(entries, list):
+        return valid
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        candidate_id = str(entry.get("candidate_id", ""))
+        if candidate_id not in candidate_ids or candidate_id in valid:
+            continue
+        result = validate_assessment(entry)
+        if result is not None:
+            valid[candidate_id] = result
+    return valid
@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from deadline import POLL_INTERVAL, Cancelled, current_deadline, remaining_timeout
+from lazy_imports import lazy_import
+from metrics import LLM_REQUESTS, span
+
+# The SDK is only needed once a call fails, and by then the client has imported it
+groq = lazy_import("groq")
+
+logger = logging.getLogger("candidate_matcher.llm_scheduler")
+
+# Lower runs first: interactive /match calls are admitted ahead of bulk scoring jobs
+INTERACTIVE = 0
+BULK = 1
+
+
+class RequestTooLarge(ValueError):
+    """The request alone is bigger than the model's tokens-per-minute limit, so the provider
+    would reject it however long it waited."""
+
+
+def retryable_errors() -> Tuple[type, ...]:
+    return groq.APIConnectionError, groq.InternalServerError
+
+
+class TokenBucket:
+    """Per-minute allowance that refills continuously; the level may go negative after a
+    request turned out bigger than estimated."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, factor: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate * factor)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float) -> float:
+        needed = amount - self.level
+        return needed / (self.rate * factor) if needed > 0 else 0.0
+
+
+class ModelLimiter:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        # (priority, sequence) of callers waiting for this model, the head is admitted next
+        self.waiting = []
+        self.blocked_until = 0.0
+        # Refill speed multiplier, cut on every 429 and slowly restored on success
+        self.rate_factor = 1.0
+        self.consecutive_limits = 0
+        self.sent = 0
+        self.rate_limited = 0
+
+
+class LlmScheduler:
+    """Admission control in front of the chat completion API.
+
+    Each model has requests-per-minute and tokens-per-minute buckets. A call reserves one
+    request and its estimated tokens before it is sent (the token reservation is corrected
+    with the usage the provider reports), and waits in a priority queue until both buckets
+    allow it, so interactive requests go ahead of bulk work. A 429 pauses the model for the
+    Retry-After the provider sent (or an exponential, jittered backoff) and slows the
+    refill rate until requests succeed again; the call is then retried. A request that is
+    bigger than the model's whole token bucket is refused instead of being sent.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], default_limits: Tuple[float, float],
+                 max_attempts: int, backoff_base: float, backoff_max: float):
+        self.limits = limits
+        self.default_limits = default_limits
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._cond = threading.Condition()
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._sequence = itertools.count()
+
+    def _limiter(self, model_name: str) -> ModelLimiter:
+        limiter = self._limiters.get(model_name)
+        if limiter is None:
+            rpm, tpm = self.limits.get(model_name, self.default_limits)
+            limiter = self._limiters[model_name] = ModelLimiter(rpm, tpm)
+        return limiter
+
+    def token_limit(self, model_name: str) -> float:
+        """Tokens per minute allowed for the model, and so the largest request it accepts."""
+        return self.limits.get(model_name, self.default_limits)[1]
+
+    def _acquire(self, model_name: str, tokens: int, priority: int):
+        deadline = current_deadline()
+        with span("llm_queue", model=model_name), self._cond:
+            limiter = self._limiter(model_name)
+            entry = (priority, next(self._sequence))
+            heapq.heappush(limiter.waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    factor = limiter.rate_factor
+                    limiter.requests.refill(now, factor)
+                    limiter.tokens.refill(now, factor)
+                    wait = None
+                    if limiter.waiting[0] == entry:
+                        wait = max(
+                            limiter.blocked_until - now,
+                            limiter.requests.wait_time(1, factor),
+                            limiter.tokens.wait_time(tokens, factor),
+                        )
+                        if wait <= 0:
+                            limiter.requests.level -= 1
+                            limiter.tokens.level -= tokens
+                            limiter.sent += 1
+                            return
+                    if deadline is not None:
+                        # A caller whose request was abandoned leaves the queue without sending
+                        deadline.check()
+                        wait = POLL_INTERVAL if wait is None else min(wait, POLL_INTERVAL)
+                    # Callers behind the head sleep until the queue moves
+                    self._cond.wait(timeout=wait)
+            finally:
+                limiter.waiting.remove(entry)
+                heapq.heapify(limiter.waiting)
+                self._cond.notify_all()
+
+    def _retry_after(self, error: "groq.APIStatusError") -> Optional[float]:
+        value = error.response.headers.get("retry-after") if error.response is not None else None
+        try:
+            return max(float(value), 0.0) if value else None
+        except ValueError:
+            return None
+
+    def _rate_limited(self, model_name: str, error: "groq.RateLimitError") -> float:
+        with self._cond:
+            limiter = self._limiter(model_name)
+            limiter.rate_limited += 1
+            limiter.consecutive_limits += 1
+            limiter.rate_factor = max(0.1, limiter.rate_factor * 0.5)
+            delay = self._retry_after(error)
+            if delay is None:
+                delay = random.uniform(0.5, 1.0) * min(self.backoff_max, self.backoff_base * 2 ** limiter.consecutive_limits)
+            limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + delay)
+            # The provider says our window is used up, whatever the local buckets think: empty them
+            # (the rejected request's reservation included) so that once the pause ends callers are
+            # let through at the refill rate instead of all at once
+            limiter.requests.level = 0.0
+            limiter.tokens.level = min(limiter.tokens.level, 0.0)
+            self._cond.notify_all()
+        return delay
+
+    def _succeeded(self, model_name: str, reserved_tokens: int, used_tokens: Optional[int]):
+        with self._cond:
+            limiter = self._limiter(model_name)
+            limiter.consecutive_limits = 0
+            limiter.rate_factor = min(1.0, limiter.rate_factor + 0.05)
+            if used_tokens is not None:
+                limiter.tokens.level += reserved_tokens - used_tokens
+            self._cond.notify_all()
+
+    def run(self, model_name: str, tokens: int, priority: int, call: Callable, size: Optional[int] = None):
+        """Runs call() once the model's limits allow `tokens` more, retrying 429s and transient errors.
+
+        `size` is what the provider counts against the limit when it admits the request (the prompt
+        plus max_tokens), it defaults to `tokens`. A size over the model's limit raises RequestTooLarge.
+        """
+        size = tokens if size is None else size
+        limit = self.token_limit(model_name)
+        if size > limit:
+            LLM_REQUESTS.inc(model=model_name, outcome="too_large")
+            raise RequestTooLarge(f"{size} tokens requested, {model_name} allows {limit:.0f} per minute")
+        attempt = 1
+        while True:
+            self._acquire(model_name, tokens, priority)
+            try:
+                result = call()
+            except groq.RateLimitError as e:
+                LLM_REQUESTS.inc(model=model_name, outcome="rate_limited")
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self._rate_limited(model_name, e)
+                logger.info("Rate limited on %s, pausing the model for %.2fs (attempt %d)", model_name, delay, attempt)
+            except retryable_errors() as e:
+                LLM_REQUESTS.inc(model=model_name, outcome="error")
+                if attempt >= self.max_attempts:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                logger.info("Retrying %s in %.2fs after %s (attempt %d)", model_name, delay, type(e).__name__, attempt)
+                time.sleep(remaining_timeout(delay))
+            except Cancelled:
+                LLM_REQUESTS.inc(model=model_name, outcome="cancelled")
+                raise
+            except Exception:
+                LLM_REQUESTS.inc(model=model_name, outcome="error")
+                raise
+            else:
+                LLM_REQUESTS.inc(model=model_name, outcome="ok")
+                usage = getattr(result, "usage", None)
+                self._succeeded(model_name, tokens, getattr(usage, "total_tokens", None))
+                return result
+            attempt += 1
+
+    def stats(self) -> Dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                model_name: {
+                    "rpm": limiter.requests.capacity,
+                    "tpm": limiter.tokens.capacity,
+                    "rate_factor": round(limiter.rate_factor, 3),
+                    "waiting": len(limiter.waiting),
+                    "paused_seconds": round(max(0.0, limiter.blocked_until - now), 3),
+                    "sent": limiter.sent,
+                    "rate_limited": limiter.rate_limited,
+                }
+                for model_name, limiter in self._limiters.items()
+            }
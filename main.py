@@ -1,36 +1,289 @@
-import requests
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from groq import Groq
-from typing import List, Dict
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Callable, List, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import asyncio
+import logging
 import json
 import re
+import time
 import random
-import PyPDF2
-import smtplib
-import http.client
+import threading
 import os
+from contextlib import asynccontextmanager
 from email.mime.text import MIMEText
+from resume_cache import ResumeCache
+from pdf_extract import PdfExtractor
+from candidate_index import CandidateIndex, posting_query
+from snapshot import SnapshotCache
+from assessment_cache import AssessmentCache, content_hash
+from jobs import ScoringJobRunner, ScoringJobStore
+from http_clients import HttpClients
+from dispatch import DispatchStore, SmtpPool, is_transient_smtp_error
+from llm_scheduler import BULK, INTERACTIVE, LlmScheduler
+from llm_output import JsonStreamParser, LlmReply, Usage, validate_assessment, validate_batch_entries
+from cascade import CascadeCalibration, CascadePolicy
+from dedup import DuplicateIndex
+from results_store import ResultsStore
+from lazy_imports import lazy_import, load_lazy_modules
+from warmup import Warmup
+from deadline import Cancelled, Deadline, check_deadline, deadline_scope, remaining_timeout
+from prompt_compiler import CompiledPosting, PromptCompiler, estimate_tokens, render_batch_candidate, select_passages
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from metrics import REGISTRY, ASSESSMENT_ERRORS, CASCADE_ESCALATIONS, DUPLICATES_SKIPPED, LLM_EARLY_STOPS, MATCH_CANCELLATIONS, record_llm_usage, register_stats, span
 
 load_dotenv()
 
+# The Groq SDK is one of the slowest imports; it is loaded by the warm-up, off the import path
+groq = lazy_import("groq")
+
+# LOG_LEVEL=DEBUG also logs full candidate records, raw LLM output and per-stage timings
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("candidate_matcher")
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared connection pools before serving and close them (and the PDF workers) on shutdown
+    http_clients.start()
+    # The rest of the warm-up runs in the background, the worker accepts connections (and /ready) meanwhile
+    warmup.start()
+    # Pick up jobs interrupted by a restart from their last checkpoint, unless another worker holds them
+    resumed = await asyncio.to_thread(scoring_jobs.resume_pending)
+    if resumed:
+        logger.info("Resumed %d scoring jobs: %s", len(resumed), ", ".join(resumed))
+    try:
+        yield
+    finally:
+        warmup.stop()
+        http_clients.close()
+        smtp_pool.close()
+        pdf_extractor.shutdown()
+
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 CALENDLY_API_KEY = os.getenv("CALENDLY_API_KEY")
 LEVER_API_KEY = os.getenv("LEVER_API_KEY")
 SMTP_EMAIL = os.getenv("SMTP_EMAIL")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+# Emails are only logged unless explicitly enabled, as we don't have credentials to send
+SEND_EMAILS = os.getenv("SEND_EMAILS", "false").lower() == "true"
+
+# Logged-in SMTP sessions are reused across emails instead of a new handshake per message
+smtp_pool = SmtpPool(
+    SMTP_HOST,
+    SMTP_PORT,
+    starttls=SMTP_STARTTLS,
+    username=SMTP_EMAIL,
+    password=SMTP_PASSWORD,
+    size=int(os.getenv("SMTP_POOL_SIZE", "3")),
+    timeout=float(os.getenv("SMTP_TIMEOUT", "30")),
+    max_idle=float(os.getenv("SMTP_MAX_IDLE", "60")),
+)
+SMTP_RETRIES = int(os.getenv("SMTP_RETRIES", "3"))
+
+# Bulk shortlist dispatch: links and emails in flight at once, and the largest accepted shortlist
+DISPATCH_CONCURRENCY = int(os.getenv("DISPATCH_CONCURRENCY", "10"))
+DISPATCH_MAX_CANDIDATES = int(os.getenv("DISPATCH_MAX_CANDIDATES", "500"))
 
 # API endpoints
-POSTINGS_URL = "https://fd4c61a1-d161-4de2-92e4-50fd468a8e82.mock.pstmn.io/postings"
-CANDIDATES_URL = "https://fd4c61a1-d161-4de2-92e4-50fd468a8e82.mock.pstmn.io/candidates"
+POSTINGS_URL = os.getenv("POSTINGS_URL", "https://fd4c61a1-d161-4de2-92e4-50fd468a8e82.mock.pstmn.io/postings")
+CANDIDATES_URL = os.getenv("CANDIDATES_URL", "https://fd4c61a1-d161-4de2-92e4-50fd468a8e82.mock.pstmn.io/candidates")
+CALENDLY_SCHEDULING_LINKS_URL = os.getenv(
+    "CALENDLY_SCHEDULING_LINKS_URL", "https://stoplight.io/mocks/calendly/api-docs/395/scheduling_links"
+)
 LEVER_API_BASE = "https://api.lever.co/v1"
 CALENDLY_LINK = "https://api.calendly.com"
 
+# Outbound HTTP: one keep-alive pool shared by resume downloads, data fetches, Lever, Calendly and Groq.
+# HTTP2_ENABLED needs the h2 package.
+http_clients = HttpClients(
+    timeout=float(os.getenv("HTTP_TIMEOUT", "15")),
+    connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+    http2=os.getenv("HTTP2_ENABLED", "false").lower() == "true",
+    retries=int(os.getenv("HTTP_RETRIES", "3")),
+    backoff_base=float(os.getenv("HTTP_BACKOFF_BASE", "0.25")),
+    backoff_max=float(os.getenv("HTTP_BACKOFF_MAX", "5")),
+)
+# LLM calls get a longer read timeout than the other upstreams
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+
+# Provider rate limits per model as (requests per minute, tokens per minute), defaults follow Groq's free tier.
+# LLM_RATE_LIMITS overrides them as JSON, e.g. {"gemma2-9b-it": {"rpm": 30, "tpm": 15000}}
+MODEL_RATE_LIMITS = {
+    "gemma2-9b-it": (30, 15000),
+    "llama3-8b-8192": (30, 6000),
+    "deepseek-r1-distill-qwen-32b": (30, 6000),
+    "qwen-2.5-32b": (30, 6000),
+}
+for rate_model, rate_limit in json.loads(os.getenv("LLM_RATE_LIMITS", "{}")).items():
+    MODEL_RATE_LIMITS[rate_model] = (float(rate_limit["rpm"]), float(rate_limit["tpm"]))
+DEFAULT_RATE_LIMITS = (float(os.getenv("LLM_DEFAULT_RPM", "30")), float(os.getenv("LLM_DEFAULT_TPM", "6000")))
+
+# Every chat completion goes through the scheduler, which also owns the retries (the SDK's own are off)
+llm_scheduler = LlmScheduler(
+    MODEL_RATE_LIMITS,
+    DEFAULT_RATE_LIMITS,
+    max_attempts=LLM_MAX_RETRIES + 1,
+    backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "1")),
+    backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "60")),
+)
+
+client: Optional["groq.Groq"] = None
+client_lock = threading.Lock()
+
+
+def get_llm_client() -> "groq.Groq":
+    global client
+    if client is None:
+        with client_lock:
+            if client is None:
+                client = groq.Groq(
+                    api_key=os.getenv("GROQ_API_KEY"),
+                    http_client=http_clients.client,
+                    timeout=LLM_TIMEOUT,
+                    max_retries=0,
+                )
+    return client
+
+# Matching settings
+# Number of best pre-ranked candidates sent to the LLM per /match call
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "10"))
+# Largest top_k a request may ask for, every one of them costs an LLM call
+MATCH_MAX_TOP_K = int(os.getenv("MATCH_MAX_TOP_K", "100"))
+# Max number of candidates scored at the same time for a single /match call
+MATCH_CONCURRENCY = int(os.getenv("MATCH_CONCURRENCY", "10"))
+# Default time budget in seconds of a /match call when the request sets none (0 = no limit)
+MATCH_TIME_BUDGET = float(os.getenv("MATCH_TIME_BUDGET", "0"))
+# How often a /match call waiting on its candidates checks whether the client is still there
+MATCH_DISCONNECT_POLL = 0.5
+# Cascade mode defaults: triage scores inside the band are re-scored with the escalation model,
+# and CASCADE_AUDIT_RATE of the other scores too, to keep the calibration stats honest
+CASCADE_ESCALATION_MODEL = os.getenv("CASCADE_ESCALATION_MODEL", "qwen-2.5-32b")
+CASCADE_BAND_LOW = float(os.getenv("CASCADE_BAND_LOW", "40"))
+CASCADE_BAND_HIGH = float(os.getenv("CASCADE_BAND_HIGH", "75"))
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0"))
+cascade_calibration = CascadeCalibration()
+
+# Resume limits: anything bigger is rejected, and parsing stops once RESUME_MAX_CHARS of text is extracted
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_MB", "10")) * 1024 * 1024
+RESUME_MAX_CHARS = int(os.getenv("RESUME_MAX_CHARS", "20000"))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+
+# PDF parsing runs on a process pool, off the request threads
+pdf_extractor = PdfExtractor(
+    workers=int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1))),
+    timeout=float(os.getenv("PDF_PARSE_TIMEOUT", "10")),
+    max_bytes=RESUME_MAX_BYTES,
+    max_chars=RESUME_MAX_CHARS,
+    max_pages=RESUME_MAX_PAGES,
+)
+
+# On-disk cache of extracted resume text, shared by every posting a candidate is matched against
+resume_cache = ResumeCache(
+    cache_dir=os.getenv("RESUME_CACHE_DIR", ".cache/resumes"),
+    max_bytes=int(os.getenv("RESUME_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    revalidate_after=float(os.getenv("RESUME_CACHE_REVALIDATE_AFTER", "3600")),
+    http=http_clients,
+    max_download_bytes=RESUME_MAX_BYTES,
+)
+
+# In-memory postings/candidates snapshot, refreshed in the background once older than the TTL
+snapshot_cache = SnapshotCache(
+    POSTINGS_URL,
+    CANDIDATES_URL,
+    ttl=float(os.getenv("SNAPSHOT_TTL", "300")),
+    http=http_clients,
+)
+
+# Bump whenever the assessment prompt changes so cached assessments from the old prompt are not reused
+PROMPT_VERSION = "2"
+BATCH_PROMPT_VERSION = f"{PROMPT_VERSION}-batch"
+
+# Posting part of each prompt, rendered once per posting and reused byte for byte
+prompt_compiler = PromptCompiler(max_postings=int(os.getenv("PROMPT_CACHE_POSTINGS", "256")))
+# Token budget for the resume passages sent with each candidate
+RESUME_EXCERPT_TOKENS = int(os.getenv("RESUME_EXCERPT_TOKENS", "400"))
+
+# Batched assessment settings: context window per model, used to size multi-candidate prompts
+MODEL_CONTEXT_TOKENS = {
+    "gemma2-9b-it": 8192,
+    "llama3-8b-8192": 8192,
+    "deepseek-r1-distill-qwen-32b": 131072,
+    "qwen-2.5-32b": 131072,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "10"))
+# Stream completions and stop reading as soon as the JSON answer is complete
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+# Reasoning models think in a <think> block before answering and need a bigger output budget;
+# the answer is parsed as it streams, so the extra budget only costs anything when it is used
+REASONING_MODELS = {"deepseek-r1-distill-qwen-32b"}
+REASONING_EXTRA_OUTPUT_TOKENS = int(os.getenv("REASONING_EXTRA_OUTPUT_TOKENS", "3072"))
+# Times an answer that doesn't fit the {score, assessment} schema is asked for again
+INVALID_RESPONSE_RETRIES = 1
+# Typical output tokens of one assessment, used to reserve rate-limit allowance before a call
+ASSESSMENT_OUTPUT_TOKENS = 200
+# Output tokens reserved per candidate in a batch, plus a fixed reserve for any preamble or reasoning
+BATCH_OUTPUT_TOKENS_PER_CANDIDATE = 200
+BATCH_OUTPUT_RESERVE_TOKENS = 1024
+
+# Durable cache of LLM assessments keyed by model, prompt version and input hashes
+assessment_cache = AssessmentCache(
+    path=os.getenv("ASSESSMENT_CACHE_PATH", ".cache/assessments.sqlite3"),
+    ttl=float(os.getenv("ASSESSMENT_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("ASSESSMENT_CACHE_MAX_ENTRIES", "100000")),
+)
+
+# Bulk scoring jobs: candidates are scored in chunks of this size and progress is checkpointed after each chunk
+SCORING_JOB_CHUNK_SIZE = int(os.getenv("SCORING_JOB_CHUNK_SIZE", "20"))
+SCORING_JOB_WORKERS = int(os.getenv("SCORING_JOB_WORKERS", "1"))
+SCORING_JOB_LEASE_SECONDS = float(os.getenv("SCORING_JOB_LEASE_SECONDS", "60"))
+scoring_job_store = ScoringJobStore(os.getenv("SCORING_JOB_DB_PATH", ".cache/scoring_jobs.sqlite3"))
+
+# Every assessment made, so a posting's ranking can be reloaded without new LLM calls
+results_store = ResultsStore(os.getenv("RESULTS_DB_PATH", ".cache/results.sqlite3"))
+
+# Record of shortlist invitations, so repeating a bulk dispatch never emails a candidate twice
+dispatch_store = DispatchStore(os.getenv("DISPATCH_DB_PATH", ".cache/dispatch.sqlite3"), stale_after=600)
+
+# Cache counters and sizes exported on /metrics
+register_stats("candidate_matcher_resume_cache_events_total", "Resume text cache lookups and evictions.", "counter",
+               resume_cache.stats, ("hits", "misses", "revalidations", "content_hits", "evictions"))
+register_stats("candidate_matcher_resume_cache_size", "Resume text cache size.", "gauge",
+               resume_cache.stats, ("entries", "bytes"))
+register_stats("candidate_matcher_assessment_cache_events_total", "LLM assessment cache lookups and evictions.", "counter",
+               assessment_cache.stats, ("hits", "misses", "bypassed", "stores", "expired", "evictions"))
+register_stats("candidate_matcher_assessment_cache_size", "LLM assessment cache size.", "gauge",
+               assessment_cache.stats, ("entries",))
+register_stats("candidate_matcher_snapshot", "Postings/candidates snapshot freshness and size.", "gauge",
+               snapshot_cache.stats, ("version", "age_seconds", "postings", "candidates", "failures"))
+
+# Lexical (BM25) pre-ranking index, so only the most relevant candidates reach the LLM
+candidate_index = CandidateIndex()
+
+# Near-duplicate detection (same person under several candidate ids), one of them is scored
+# and the result is shared with the others
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+duplicate_index = DuplicateIndex(threshold=float(os.getenv("DEDUP_THRESHOLD", "0.7")))
+
 
 # Pydantic models
 class Candidate(BaseModel):
@@ -56,14 +309,37 @@ class JobPosting(BaseModel):
 class MatchRequest(BaseModel):
     job_id: str
     model_name: str
+    top_k: Optional[int] = Field(default=None, ge=1, le=MATCH_MAX_TOP_K)
+    bypass_cache: bool = False
+    batch: bool = False
+    # Cascade mode: model_name triages everyone, close calls are re-scored with escalation_model
+    cascade: bool = False
+    escalation_model: Optional[str] = None
+    uncertainty_band: Optional[Tuple[float, float]] = None
+    # Seconds after which the candidates scored so far are returned and the rest is cancelled
+    time_budget: Optional[float] = None
 
 class MatchResponse(BaseModel):
     candidate_id: str
     name: str
-    match_score: float
+    # None when no assessment could be made, error then says why
+    match_score: Optional[float]
     email: str
     assessment: str
     job_title: str
+    error: Optional[str] = None
+    # Set when this candidate is a duplicate of another record that was scored in its place
+    duplicate_of: Optional[str] = None
+    # Model and prompt version that produced match_score, and the triage model's score when it was escalated
+    model_name: Optional[str] = None
+    prompt_version: Optional[str] = None
+    triage_score: Optional[float] = None
+
+class ScoringJobRequest(BaseModel):
+    job_id: str
+    model_name: str
+    batch: bool = False
+    bypass_cache: bool = False
 
 class CalendlyRequest(BaseModel):
     candidate_id: str
@@ -71,19 +347,37 @@ class CalendlyRequest(BaseModel):
     candidate_email: str
     job_title: str
 
+class ShortlistDispatchRequest(BaseModel):
+    candidates: List[CalendlyRequest]
+    # Send again to candidates already invited for the same job title
+    force: bool = False
+
+
+def extract_pdf_text(content: bytes) -> str:
+    with span("pdf_parse"):
+        return pdf_extractor.extract(content)
 
-# Fetch and parse resume from URL
-def fetch_resume_summary(resume_url: str) -> str:
+
+# Full resume text, served from the resume cache when possible
+def fetch_resume_text(resume_url: str) -> str:
+    return resume_cache.get(resume_url, extract_pdf_text)
+
+
+# Fetch and parse resume from URL, keeping the passages most relevant to the posting
+def fetch_resume_excerpts(resume_url: str, query: Counter, candidate_id: Optional[str] = None) -> Optional[List[str]]:
     try:
-        response = requests.get(resume_url)
-        response.raise_for_status()
-        pdf_file = PyPDF2.PdfReader(response.content)
-        text = ""
-        for page in pdf_file.pages:
-            text += page.extract_text()
-        return text[:1000]  # Limit to 1000 chars for LLM
+        text = fetch_resume_text(resume_url)
+    except Cancelled:
+        raise
     except Exception as e:
-        return f"Failed to fetch resume: {str(e)}"
+        logger.warning("Failed to fetch resume %s: %s", resume_url, str(e))
+        return None
+    if candidate_id:
+        candidate_index.attach_resume(candidate_id, text)
+        if DEDUP_ENABLED:
+            duplicate_index.attach_resume(candidate_id, text)
+    with span("resume_select"):
+        return [sanitize_text(passage) for passage in select_passages(text, query, RESUME_EXCERPT_TOKENS)]
 
 
 
@@ -92,125 +386,243 @@ def sanitize_text(text: str) -> str:
     return re.sub(r"[\x00-\x1F\x7F]", "", text)
 
 
-def get_llm_assessment(candidate: Dict, posting: Dict, model_name: str) -> Dict:
-    try:
-        # Sanitize candidate data
-        candidate = {key: sanitize_text(value) if isinstance(value, str) else value for key, value in candidate.items()}
+def prepare_candidate_details(candidate: Dict, query: Counter) -> Dict:
+    # Sanitize candidate data
+    candidate = {key: sanitize_text(value) if isinstance(value, str) else value for key, value in candidate.items()}
 
-        # Fetch and sanitize resume details
-        resume_details = sanitize_text(fetch_resume_summary(candidate["resume_url"]))
-        resume_details = json.dumps(resume_details)  
+    # Resume passages relevant to the posting, or None when the resume couldn't be fetched
+    resume_excerpts = fetch_resume_excerpts(candidate["resume_url"], query, candidate["id"])
 
-        # Prepare job and candidate details
-        job_details = {
-            "title": posting["text"],
-            "commitment": posting["categories"]["commitment"],
-            "location": posting["categories"]["location"],
-            "team": posting["categories"]["team"],
-            "all_locations": posting["categories"]["allLocations"],
-            "tags": posting["tags"],
-            "description": posting["content"]["description"],
-            "requirements": "\n".join([f"{lst['text']}: {lst['content']}" for lst in posting["content"]["lists"]]),
-            "country": posting["country"],
-            "workplace_type": posting["workplaceType"]
-        }
+    return {
+        "headline": candidate["headline"],
+        "location": candidate["location"],
+        "tags": candidate["tags"],
+        "origin": candidate["origin"],
+        "opportunity_location": candidate["opportunityLocation"],
+        "resume_excerpts": resume_excerpts
+    }
 
-        cand_details = {
-            "headline": candidate["headline"],
-            "location": candidate["location"],
-            "tags": candidate["tags"],
-            "origin": candidate["origin"],
-            "opportunity_location": candidate["opportunityLocation"],
-            "resume_complete_summary": resume_details
-        }
 
-        # Prepare LLM prompt
-        prompt = f"""
-        You are an AI talent evaluator. Your task is to assess how well a candidate matches a job posting based on their skills, experience, and qualifications.
-
-        Instructions:
-        Evaluate the candidate objectively without bias or unnecessary criticism.
-        Ensure no humiliation or negative wording in your assessment.
-        Return only a structured JSON response—no extra explanations or text.
-
-        Job Posting Details:
-        Title: {job_details["title"]}
-        Commitment: {job_details["commitment"]}
-        Location: {job_details["location"]}
-        Team: {job_details["team"]}
-        All Locations: {', '.join(job_details["all_locations"])}
-        Tags: {', '.join(job_details["tags"])}
-        Description: {job_details["description"]}
-        Requirements: {job_details["requirements"]}
-        Country: {job_details["country"]}
-        Workplace Type: {job_details["workplace_type"]}
-
-        Candidate Details:
-        Headline: {cand_details["headline"]}
-        Location: {cand_details["location"]}
-        Tags: {', '.join(cand_details["tags"])}
-        Origin: {cand_details["origin"]}
-        Opportunity Location: {cand_details["opportunity_location"]}
-        Resume Summary: {resume_details}
-
-        Evaluation Criteria:
-        Assess the candidate based on:
-
-        Skill & Experience Match - Does the candidate's experience align with job requirements?
-        Location Fit - Is the candidate located in an eligible area or open to relocation?
-        Education & Qualifications - Do they meet or exceed the required credentials?
-
-        Language Proficiency - Are they fluent in the necessary languages?
-
-        Output Format (JSON Only)
-        Return your response in the exact format below, with a match score (0-100) and a concise, constructive assessment.
-
-        {{
-          "score": <number>,
-          "assessment": "<brief, neutral explanation of strengths and areas for improvement>"
-        }}
-        """
-
-        # Call LLM with the specified model
-        completion = client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=1,
-            max_tokens=1024,
-            top_p=1,
-            stream=False,
-            stop=None,
-        )
-
-        # Collect streaming response
-        full_response = completion.choices[0].message.content
-
-        # Clean up the response
-        cleaned_response = full_response.strip()
-        if cleaned_response.startswith("```json"):
-            cleaned_response = cleaned_response[7:] 
-        if cleaned_response.endswith("```"):
-            cleaned_response = cleaned_response[:-3] 
-        cleaned_response = cleaned_response.strip()
-        print("Cleaned LLM Response:", cleaned_response)
-
-        # Check if the response is empty
-        if not cleaned_response.strip():
-            print(f"Empty response for candidate: {candidate['id']}")
-            return {"score": 0, "assessment": "No response from LLM"}
+def has_resume(cand_details: Dict) -> bool:
+    return cand_details["resume_excerpts"] is not None
+
+
+def error_result(reason: str, assessment: str) -> Dict:
+    # Failed assessments have no score, so they can't be ranked as a genuinely poor match
+    ASSESSMENT_ERRORS.inc(reason=reason)
+    return {"score": None, "assessment": assessment, "error": reason}
+
 
+def call_llm(model_name: str, prompt: str, max_tokens: int, opener: str = "{", priority: int = INTERACTIVE,
+             expected_output_tokens: Optional[int] = None, validate: Optional[Callable] = None) -> LlmReply:
+    """Gets the first JSON value starting with `opener` (and passing `validate`, if given) from the
+    model's answer, skipping <think> blocks.
+
+    When streaming, the response is closed as soon as that value is complete, so any text the
+    model would add afterwards is neither waited for nor generated.
+    """
+    prompt_tokens = estimate_tokens(prompt)
+
+    def send() -> LlmReply:
+        parser = JsonStreamParser(opener, validate)
+        check_deadline()
         try:
-            result = json.loads(cleaned_response)
-            return result
-        except json.JSONDecodeError as e:
-            print(f"Error parsing LLM response for candidate: {candidate['id']}")
-            print(f"Raw response: {cleaned_response}")
-            return {"score": 0, "assessment": "Invalid response format from LLM"}
+            with span("llm_call", model=model_name):
+                response = get_llm_client().chat.completions.create(
+                    model=model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=1,
+                    max_tokens=max_tokens,
+                    top_p=1,
+                    stream=LLM_STREAMING,
+                    stop=None,
+                    timeout=remaining_timeout(LLM_TIMEOUT),
+                )
+                if not LLM_STREAMING:
+                    parser.feed(response.choices[0].message.content or "")
+                    return LlmReply(parser.text, parser.value, getattr(response, "usage", None))
+
+                usage = None
+                try:
+                    for chunk in response:
+                        # Closing the stream (below) stops the generation we no longer need
+                        check_deadline()
+                        x_groq = getattr(chunk, "x_groq", None)
+                        if x_groq is not None and x_groq.usage is not None:
+                            usage = x_groq.usage
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if parser.feed(chunk.choices[0].delta.content) is not None:
+                                break
+                finally:
+                    response.close()
+        except Exception:
+            # A call cut short by the request's deadline is a cancellation, not an LLM error
+            check_deadline()
+            raise
+        # Usage is only reported at the end of the stream, estimate it when we stopped early
+        early_stop = parser.done and usage is None
+        if usage is None:
+            usage = Usage(prompt_tokens, estimate_tokens(parser.text))
+        return LlmReply(parser.text, parser.value, usage, early_stop)
+
+    # Waits for the model's RPM/TPM allowance; the token estimate is corrected with the reported usage
+    reserved_tokens = prompt_tokens + (expected_output_tokens or max_tokens)
+    reply = llm_scheduler.run(model_name, reserved_tokens, priority, send, size=prompt_tokens + max_tokens)
+    if reply.early_stop:
+        LLM_EARLY_STOPS.inc(model=model_name)
+    record_llm_usage(model_name, reply.usage)
+    return reply
+
+
+def get_llm_assessment(candidate: Dict, posting: Dict, model_name: str, use_cache: bool = True, cand_details: Optional[Dict] = None,
+                       priority: int = INTERACTIVE) -> Dict:
+    try:
+        # Prepare job and candidate details
+        compiled = prompt_compiler.compile(posting)
+        job_details = compiled.job_details
+        if cand_details is None:
+            cand_details = prepare_candidate_details(candidate, compiled.query)
+
+        # Reuse a previous assessment when model, prompt and inputs are unchanged
+        cache_key = AssessmentCache.make_key(model_name, PROMPT_VERSION, job_details, cand_details)
+        if use_cache:
+            cached = assessment_cache.get(cache_key)
+            if cached is not None:
+                # Flagged so the cascade's calibration only learns from fresh model calls
+                return dict(cached, cached=True)
+        else:
+            assessment_cache.record_bypass()
 
+        # Prepare LLM prompt
+        with span("prompt_build"):
+            prompt = compiled.assessment_prompt(cand_details)
+
+        # Call LLM with the specified model, asking again once if the answer doesn't fit the schema
+        for attempt in range(1 + INVALID_RESPONSE_RETRIES):
+            reply = call_llm(model_name, prompt, max_tokens=output_token_limit(model_name, 1024), priority=priority,
+                             expected_output_tokens=ASSESSMENT_OUTPUT_TOKENS, validate=validate_assessment)
+            logger.debug("LLM response for candidate %s: %s", candidate["id"], reply.text)
+            with span("json_parse"):
+                result = validate_assessment(reply.value)
+            if result is not None:
+                break
+            logger.warning("Invalid LLM response for candidate %s (attempt %d)", candidate["id"], attempt + 1)
+        else:
+            if not reply.text.strip():
+                return error_result("empty_response", "No response from LLM")
+            return error_result("invalid_json", "Invalid response format from LLM")
+
+        # Don't keep assessments made without the resume, the next call may be able to fetch it
+        if has_resume(cand_details):
+            assessment_cache.put(cache_key, model_name, PROMPT_VERSION, result)
+        return result
+
+    except Cancelled:
+        raise
+    except groq.RateLimitError as e:
+        logger.error("Rate limit retries exhausted for candidate %s: %s", candidate["id"], str(e))
+        return error_result("rate_limited", "LLM rate limit reached, try again later")
     except Exception as e:
-        print(f"Error generating LLM assessment for candidate: {candidate['id']}")
-        print(f"Error details: {str(e)}")
-        return {"score": 0, "assessment": "Error generating assessment"}
+        logger.error("Error generating LLM assessment for candidate %s: %s", candidate["id"], str(e))
+        return error_result("exception", "Error generating assessment")
+
+
+def output_token_limit(model_name: str, answer_tokens: int) -> int:
+    return answer_tokens + (REASONING_EXTRA_OUTPUT_TOKENS if model_name in REASONING_MODELS else 0)
+
+
+def plan_batches(compiled: CompiledPosting, pending: List[Tuple], model_name: str) -> List[List[Tuple]]:
+    # Greedily pack candidates into prompts whose size, the prompt plus the max_tokens asked for, fits
+    # both the model's context window and its tokens-per-minute limit (the provider rejects bigger ones)
+    budget = min(MODEL_CONTEXT_TOKENS.get(model_name, DEFAULT_CONTEXT_TOKENS), llm_scheduler.token_limit(model_name))
+    base_cost = estimate_tokens(compiled.batch_prompt([])) + output_token_limit(model_name, BATCH_OUTPUT_RESERVE_TOKENS)
+    batches, current, used = [], [], base_cost
+    for item in pending:
+        candidate, cand_details = item[1], item[2]
+        cost = estimate_tokens(render_batch_candidate(candidate["id"], cand_details)) + BATCH_OUTPUT_TOKENS_PER_CANDIDATE
+        if current and (used + cost > budget or len(current) >= BATCH_MAX_SIZE):
+            batches.append(current)
+            current, used = [], base_cost
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def get_llm_batch_assessment(candidates: List[Dict], posting: Dict, model_name: str, use_cache: bool = True,
+                             priority: int = INTERACTIVE) -> List[Dict]:
+    """Scores several candidates per chat completion, sharing one posting header."""
+    compiled = prompt_compiler.compile(posting)
+    job_details = compiled.job_details
+    results: List[Optional[Dict]] = [None] * len(candidates)
+
+    pending = []
+    for position, candidate in enumerate(candidates):
+        try:
+            cand_details = prepare_candidate_details(candidate, compiled.query)
+        except Cancelled:
+            raise
+        except Exception as e:
+            logger.error("Error preparing candidate %s: %s", candidate.get("id"), str(e))
+            results[position] = error_result("exception", "Error generating assessment")
+            continue
+        cache_key = AssessmentCache.make_key(model_name, BATCH_PROMPT_VERSION, job_details, cand_details)
+        if use_cache:
+            cached = assessment_cache.get(cache_key)
+            if cached is not None:
+                results[position] = dict(cached, cached=True)
+                continue
+        else:
+            assessment_cache.record_bypass()
+        pending.append((position, candidate, cand_details, cache_key))
+
+    for batch in plan_batches(compiled, pending, model_name):
+        valid = {}
+        # Set when the call itself failed; only a reply that fails validation falls back to single calls
+        failure = None
+        batch_ids = {candidate["id"] for _, candidate, _, _ in batch}
+        try:
+            with span("prompt_build"):
+                prompt = compiled.batch_prompt([(candidate["id"], details) for _, candidate, details, _ in batch])
+            reply = call_llm(
+                model_name, prompt,
+                max_tokens=output_token_limit(
+                    model_name, BATCH_OUTPUT_RESERVE_TOKENS + BATCH_OUTPUT_TOKENS_PER_CANDIDATE * len(batch)
+                ),
+                opener="[",
+                priority=priority,
+                expected_output_tokens=BATCH_OUTPUT_TOKENS_PER_CANDIDATE * len(batch),
+                validate=lambda value: validate_batch_entries(value, batch_ids),
+            )
+            logger.debug("Batch LLM response: %s", reply.text)
+            with span("json_parse"):
+                valid = validate_batch_entries(reply.value, batch_ids)
+        except Cancelled:
+            raise
+        except groq.RateLimitError as e:
+            # Retries are exhausted; one call per candidate would only hit the same limit harder
+            logger.error("Rate limit retries exhausted for a batch of %d candidates: %s", len(batch), str(e))
+            failure = ("rate_limited", "LLM rate limit reached, try again later")
+        except Exception as e:
+            logger.error("Error generating batched LLM assessment for %d candidates: %s", len(batch), str(e))
+            failure = ("exception", "Error generating assessment")
+
+        for position, candidate, cand_details, cache_key in batch:
+            result = valid.get(candidate["id"])
+            if failure is not None:
+                result = error_result(*failure)
+            elif result is None:
+                # Malformed or missing entry, score this candidate on its own
+                logger.info("Falling back to single assessment for candidate: %s", candidate["id"])
+                ASSESSMENT_ERRORS.inc(reason="batch_fallback")
+                result = dict(get_llm_assessment(candidate, posting, model_name, use_cache, cand_details, priority),
+                              prompt_version=PROMPT_VERSION)
+            elif has_resume(cand_details):
+                assessment_cache.put(cache_key, model_name, BATCH_PROMPT_VERSION, result)
+            results[position] = result
+
+    return results
     
 
 
@@ -219,13 +631,30 @@ def get_llm_assessment(candidate: Dict, posting: Dict, model_name: str) -> Dict:
 def move_candidate_to_next_stage(candidate_id: str):
     headers = {"Authorization": f"Bearer {LEVER_API_KEY}"}
     payload = {"stage": "next-stage-id"}
-    response = requests.post(
+    response = http_clients.post(
         f"{LEVER_API_BASE}/candidates/{candidate_id}/stage",
         headers=headers,
         json=payload
     )
     return response.status_code == 200
 
+def send_smtp_message(msg: MIMEText):
+    # Sent over a pooled session; 4xx replies and dropped connections are retried with jittered backoff
+    attempt = 0
+    while True:
+        try:
+            with span("smtp_send"):
+                smtp_pool.send(msg)
+            return
+        except Exception as e:
+            if attempt >= SMTP_RETRIES or not is_transient_smtp_error(e):
+                raise
+            delay = random.uniform(0, min(5.0, 0.5 * 2 ** attempt))
+            logger.warning("Retrying email to %s in %.2fs: %s", msg["To"], delay, str(e))
+            time.sleep(delay)
+            attempt += 1
+
+
 # Send email with Calendly link
 def send_candidate_email(candidate: Dict, job_title: str):
     msg = MIMEText(
@@ -236,171 +665,726 @@ def send_candidate_email(candidate: Dict, job_title: str):
     msg["From"] = SMTP_EMAIL
     msg["To"] = candidate["emails"][0]
 
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(SMTP_EMAIL, SMTP_PASSWORD)
-        server.send_message(msg)
+    send_smtp_message(msg)
 
 
 def fetch_data():
     try:
-        # Fetch postings and candidates from the respective URLs
-        postings_response = requests.get(POSTINGS_URL)
-        candidates_response = requests.get(CANDIDATES_URL)
-
-        postings_response.raise_for_status()
-        candidates_response.raise_for_status()
-
-        # Parse the JSON responses
-        postings = postings_response.json().get("postings", [])
-        candidates = candidates_response.json().get("candidates", [])
+        # Postings and candidates come from the snapshot cache instead of a full download per call
+        with span("data_fetch"):
+            snapshot = snapshot_cache.get()
 
         # Log the count of candidates
-        print(f"Number of candidates fetched: {len(candidates)}")
+        logger.debug("Number of candidates in snapshot v%s: %d", snapshot.version, len(snapshot.candidates))
 
-        return postings, candidates
+        return snapshot
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Data fetch failed: {str(e)}")
     
 
-# FastAPI endpoint
-@app.post("/match", response_model=List[MatchResponse])
-async def match_candidates(request: MatchRequest):
-    #select random 10 candidate and pass to llm model function to get fitout score.
-    postings, candidates = fetch_data()
-    print(f"Total candidates: {len(candidates)}")
-    posting = next((p for p in postings if p["id"] == request.job_id), None)
+def build_match_response(candidate: Dict, posting: Dict, result: Dict, duplicate_of: Optional[str] = None) -> MatchResponse:
+    return MatchResponse(
+        candidate_id=candidate["id"],
+        name=candidate["name"],
+        match_score=result["score"],
+        email=(candidate.get("emails") or [""])[0],
+        assessment=result["assessment"],
+        job_title=posting['text'],
+        error=result.get("error"),
+        model_name=result.get("model_name"),
+        prompt_version=result.get("prompt_version"),
+        triage_score=result.get("triage_score"),
+        duplicate_of=duplicate_of,
+    )
+
+
+def assess_group(candidates: List[Dict], posting: Dict, model_name: str, use_cache: bool, batch: bool,
+                 priority: int = INTERACTIVE) -> List[Dict]:
+    # One result per candidate in order, tagged with the model that produced it
+    if batch:
+        results = get_llm_batch_assessment(candidates, posting, model_name, use_cache, priority=priority)
+    else:
+        results = [get_llm_assessment(candidate, posting, model_name, use_cache, priority=priority) for candidate in candidates]
+    default_version = BATCH_PROMPT_VERSION if batch else PROMPT_VERSION
+    return [dict(result, model_name=model_name, prompt_version=result.get("prompt_version", default_version))
+            for result in results]
+
+
+def cascade_assessment(candidates: List[Dict], posting: Dict, policy: CascadePolicy, use_cache: bool, batch: bool,
+                       priority: int = INTERACTIVE) -> List[Dict]:
+    """Triage everyone with the small model, then re-score the close calls with the larger one."""
+    results = assess_group(candidates, posting, policy.triage_model, use_cache, batch, priority)
+    cascade_calibration.record_triage(policy, len(candidates))
+    escalate = []
+    for position, result in enumerate(results):
+        reason = policy.escalation_reason(result["score"])
+        if reason is not None:
+            escalate.append((position, reason))
+    if not escalate:
+        return results
+
+    with span("cascade_escalation", model=policy.escalation_model):
+        escalated = assess_group([candidates[position] for position, _ in escalate], posting,
+                                 policy.escalation_model, use_cache, batch, priority)
+    for (position, reason), result in zip(escalate, escalated):
+        triage_score = results[position]["score"]
+        CASCADE_ESCALATIONS.inc(triage_model=policy.triage_model, escalation_model=policy.escalation_model, reason=reason)
+        # A pair served entirely from the assessment cache was already counted when it was first scored
+        fresh = not (results[position].get("cached") and result.get("cached"))
+        cascade_calibration.record_escalation(policy, reason, triage_score, result["score"], calibrate=fresh)
+        # A failed escalation keeps the triage score rather than dropping the candidate
+        if result["score"] is not None or triage_score is None:
+            results[position] = dict(result, triage_score=triage_score)
+    return results
+
+
+def make_assessor(request: MatchRequest) -> Callable[[List[Dict], Dict], List[Dict]]:
+    use_cache = not request.bypass_cache
+    if not request.cascade:
+        return lambda candidates, posting: assess_group(candidates, posting, request.model_name, use_cache, request.batch)
+    band_low, band_high = request.uncertainty_band or (CASCADE_BAND_LOW, CASCADE_BAND_HIGH)
+    if band_low > band_high:
+        raise HTTPException(status_code=400, detail="uncertainty_band must be [low, high] with low <= high")
+    policy = CascadePolicy(request.model_name, request.escalation_model or CASCADE_ESCALATION_MODEL,
+                           band_low, band_high, CASCADE_AUDIT_RATE)
+    return lambda candidates, posting: cascade_assessment(candidates, posting, policy, use_cache, request.batch)
+
+
+async def score_group(candidates: List[Dict], posting: Dict, assess: Callable, semaphore: asyncio.Semaphore,
+                      duplicates: Dict[str, List[Dict]]) -> List[MatchResponse]:
+    # Assessment is blocking (resume download + Groq calls), so it runs in a worker thread
+    # and the semaphore caps how many groups are scored at the same time.
+    async with semaphore:
+        logger.debug("Scoring candidates: %s", [candidate.get("id") for candidate in candidates])
+        try:
+            results = await asyncio.to_thread(assess, candidates, posting)
+        except Cancelled:
+            # The request gave up on these candidates, they are reported as pending, not failed
+            raise
+        except Exception as e:
+            logger.error("Error scoring %d candidates: %s", len(candidates), str(e))
+            results = [error_result("exception", "Error generating assessment") for _ in candidates]
+    logger.debug("LLM results: %s", results)
+    try:
+        matches = []
+        for candidate, result in zip(candidates, results):
+            matches.append(build_match_response(candidate, posting, result))
+            # Other records of the same person get the same assessment
+            for duplicate in duplicates.get(candidate["id"], []):
+                matches.append(build_match_response(duplicate, posting, result, duplicate_of=candidate["id"]))
+    except Exception:
+        # A malformed candidate record fails its group instead of silently going missing from the response
+        logger.exception("Error building match results for %d candidates", len(candidates))
+        failed = error_result("exception", "Error generating assessment")
+        matches = [build_match_response(candidate, posting, failed) for candidate in candidates]
+    await asyncio.to_thread(store_results, [dict(jsonable_encoder(match), job_id=posting["id"]) for match in matches], "match")
+    return matches
+
+
+def store_results(rows: List[Dict], source: str):
+    # Rows use the MatchResponse field names; a failed write only costs the history, not the response
+    try:
+        with span("results_store"):
+            results_store.record([dict(row, score=row.get("match_score")) for row in rows], source)
+    except Exception as e:
+        logger.error("Error storing %d results: %s", len(rows), str(e))
+
+
+def start_scoring(request: MatchRequest, assess: Callable, posting: Dict, candidates: List[Dict],
+                  duplicates: Dict[str, List[Dict]], deadline: Deadline) -> List[asyncio.Task]:
+    # One task per candidate, or per batch of candidates in batch mode; each task resolves to a
+    # list of MatchResponse in candidate order. Tasks (and their worker threads) run under the
+    # request's deadline.
+    semaphore = asyncio.Semaphore(MATCH_CONCURRENCY)
+    size = BATCH_MAX_SIZE if request.batch else 1
+    with deadline_scope(deadline):
+        return [
+            asyncio.create_task(score_group(candidates[i:i + size], posting, assess, semaphore, duplicates))
+            for i in range(0, len(candidates), size)
+        ]
+
+
+async def select_within_deadline(request: MatchRequest, deadline: Deadline):
+    """select_candidates (snapshot fetch, index sync, ranking) bounded by the request's deadline.
+    None when the budget ran out before the candidates were picked. The fetch and sync keep
+    running in their worker thread, they update shared state the next request uses."""
+    try:
+        return await asyncio.wait_for(select_candidates(request), deadline.remaining())
+    except asyncio.TimeoutError:
+        deadline.expired()
+        MATCH_CANCELLATIONS.inc(reason=deadline.reason)
+        return None
+
+
+def match_deadline(request: MatchRequest) -> Deadline:
+    budget = request.time_budget if request.time_budget is not None else MATCH_TIME_BUDGET
+    if budget < 0:
+        raise HTTPException(status_code=400, detail="time_budget must be positive")
+    return Deadline(budget or None)
+
+
+async def completed_groups(tasks: List[asyncio.Task], deadline: Deadline, http_request: Optional[Request] = None):
+    """Yields (task position, matches) as scoring tasks finish, until all are done, the deadline
+    passes or the client disconnects. Whatever is still running then is cancelled, deadline
+    included, so downloads and LLM calls in worker threads stop too."""
+    positions = {task: position for position, task in enumerate(tasks)}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline.remaining()
+            if remaining is not None and remaining <= 0:
+                break
+            if http_request is not None and await http_request.is_disconnected():
+                deadline.cancel("client_disconnected")
+                break
+            wait = MATCH_DISCONNECT_POLL if remaining is None else min(remaining, MATCH_DISCONNECT_POLL)
+            done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=positions.get):
+                # Tasks cut short by the deadline have no result
+                if task.cancelled() or isinstance(task.exception(), Cancelled):
+                    continue
+                if task.exception() is not None:
+                    # score_group turns failures into error results, anything left is a bug: log it, don't drop it silently
+                    logger.error("Scoring task %d failed", positions[task], exc_info=task.exception())
+                    continue
+                yield positions[task], task.result()
+    finally:
+        if pending:
+            # Left early without the deadline passing: the client went away
+            if not deadline.expired():
+                deadline.cancel("client_disconnected")
+            MATCH_CANCELLATIONS.inc(reason=deadline.reason)
+            for task in pending:
+                task.cancel()
+
+
+async def select_candidates(request: MatchRequest):
+    # Pre-rank the candidate pool against the posting and pass the top K to the llm model function to get fitout score.
+    snapshot = await asyncio.to_thread(fetch_data)
+    logger.info("Matching posting %s against %d candidates", request.job_id, len(snapshot.candidates))
+    posting = snapshot.postings_by_id.get(request.job_id)
 
     if not posting:
         raise HTTPException(status_code=404, detail="Job posting not found")
 
-    # Select 10 random candidates
-    random_candidates = random.sample(candidates, min(10, len(candidates)))
-
-    matches = []
-    for candidate in random_candidates:
-        print(candidate)
-        result = get_llm_assessment(candidate, posting,request.model_name)
-        print("=="*50)
-        print("LLM Result:", result)
-        match_response = MatchResponse(
-            candidate_id=candidate["id"],
-            name=candidate["name"],
-            match_score=result["score"],
-            email=candidate["emails"][0],
-            assessment=result["assessment"],
-            job_title=posting['text']
-        )
-
-        
-        matches.append(match_response)
-       
-        #if we set manual thresold then HR don't need to move to next stage system automtically take care of that. 
-        # Move to next stage and notify if approved
-        # if score > 70:  # Threshold for approval
-        #     if move_candidate_to_next_stage(candidate["id"]):
-        #         send_candidate_email(candidate, posting["text"])
-        #         print(f"Moved {candidate['name']} to next stage and sent email.")
-        #     else:
-        #         print(f"Failed to move {candidate['name']} to next stage.")
+    # The indexes are only re-synced when the candidate snapshot changed; resume text is used when it is already cached
+    await asyncio.to_thread(candidate_index.sync, snapshot.candidates, snapshot.version, resume_cache.peek)
+    if DEDUP_ENABLED:
+        await asyncio.to_thread(duplicate_index.sync, snapshot.candidates, snapshot.version, resume_cache.peek)
+    top_k = request.top_k or MATCH_TOP_K
+    ranked = await asyncio.to_thread(rank_distinct, posting_query(posting), top_k)
+
+    # The index may already be on a newer snapshot than this request's, skip candidates it doesn't have
+    ranked = [candidate_id for candidate_id in ranked if candidate_id in snapshot.candidates_by_id]
+    top_candidates = [snapshot.candidates_by_id[candidate_id] for candidate_id in ranked]
+    duplicates = {}
+    if DEDUP_ENABLED:
+        # May wait for the index lock or a cluster rebuild, so it stays off the event loop
+        duplicates = await asyncio.to_thread(duplicate_records, ranked, snapshot.candidates_by_id)
+    return posting, top_candidates, duplicates
+
+
+def duplicate_records(candidate_ids: List[str], candidates_by_id: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+    # The other records of each candidate's cluster that are in the snapshot
+    duplicates = {}
+    for candidate_id in candidate_ids:
+        members = [candidates_by_id[member] for member in duplicate_index.members(candidate_id)
+                   if member != candidate_id and member in candidates_by_id]
+        if members:
+            duplicates[candidate_id] = members
+            DUPLICATES_SKIPPED.inc(len(members), source="match")
+    return duplicates
+
+
+def rank_distinct(query: Counter, top_k: int) -> List[str]:
+    # BM25 top K counting each person once, so duplicate records don't take several of the K slots
+    k = top_k
+    while True:
+        ranked = candidate_index.top_k(query, k)
+        representatives, seen = [], set()
+        for candidate_id, _ in ranked:
+            cluster = duplicate_index.cluster_id(candidate_id) if DEDUP_ENABLED else candidate_id
+            if cluster not in seen:
+                seen.add(cluster)
+                representatives.append(candidate_id)
+        if len(representatives) >= top_k or len(ranked) < k:
+            return representatives[:top_k]
+        k *= 2
+
+
+def group_duplicates(candidates: List[Dict]) -> Tuple[List[Dict], List[int]]:
+    # One representative per person, plus the representative's position for every candidate
+    representatives, slots, positions = [], [], {}
+    for candidate in candidates:
+        cluster = duplicate_index.cluster_id(candidate["id"]) if DEDUP_ENABLED else candidate["id"]
+        if cluster not in positions:
+            positions[cluster] = len(representatives)
+            representatives.append(candidate)
+        slots.append(positions[cluster])
+    return representatives, slots
+
+
+def score_job_chunk(posting: Dict, candidates: List[Dict], job: Dict) -> List[Dict]:
+    # Called from a scoring job worker thread, one result per candidate in order. Bulk work
+    # only gets LLM capacity that interactive /match requests are not waiting for.
+    options = job["options"]
+    representatives, slots = group_duplicates(candidates)
+    DUPLICATES_SKIPPED.inc(len(candidates) - len(representatives), source="scoring_job")
+    if options.get("batch"):
+        results = get_llm_batch_assessment(representatives, posting, job["model_name"], options["use_cache"], priority=BULK)
+    else:
+        with ThreadPoolExecutor(max_workers=MATCH_CONCURRENCY) as pool:
+            results = list(pool.map(
+                lambda candidate: get_llm_assessment(candidate, posting, job["model_name"], options["use_cache"],
+                                                     priority=BULK),
+                representatives,
+            ))
+    default_version = BATCH_PROMPT_VERSION if options.get("batch") else PROMPT_VERSION
+    rows = []
+    for candidate, slot in zip(candidates, slots):
+        result = results[slot]
+        representative = representatives[slot]["id"]
+        rows.append({
+            "job_id": posting["id"],
+            "candidate_id": candidate["id"],
+            "name": candidate.get("name"),
+            "email": (candidate.get("emails") or [None])[0],
+            "job_title": posting["text"],
+            "match_score": result["score"],
+            "assessment": result["assessment"],
+            "error": result.get("error"),
+            "model_name": job["model_name"],
+            "prompt_version": result.get("prompt_version", default_version),
+            "duplicate_of": representative if representative != candidate["id"] else None,
+        })
+    store_results(rows, "scoring_job")
+    return [results[slot] for slot in slots]
 
-    return matches
 
+def load_job_data():
+    snapshot = snapshot_cache.get()
+    if DEDUP_ENABLED:
+        duplicate_index.sync(snapshot.candidates, snapshot.version, resume_cache.peek)
+    return snapshot.postings_by_id, snapshot.candidates_by_id
 
 
+scoring_jobs = ScoringJobRunner(
+    scoring_job_store,
+    score_chunk=score_job_chunk,
+    load_data=load_job_data,
+    chunk_size=SCORING_JOB_CHUNK_SIZE,
+    workers=SCORING_JOB_WORKERS,
+    lease_seconds=SCORING_JOB_LEASE_SECONDS,
+)
 
-@app.post("/generate-calendly-link-send-email")
-async def generate_calendly_link(request: CalendlyRequest):
-    try:
-        # Mock API call to Calendly to generate link and send email
-        conn = http.client.HTTPSConnection("stoplight.io")
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {CALENDLY_API_KEY}"
-        }
-        payload = json.dumps({
-            "max_event_count": 1,
-            "owner": "https://api.calendly.com/event_types/012345678901234567890",
-            "owner_type": "EventType"
-        })
-        conn.request("POST", "/mocks/calendly/api-docs/395/scheduling_links", payload, headers)
-        res = conn.getresponse()
-        data = res.read()
-        mock_response = json.loads(data.decode("utf-8"))  # Parse JSON response
-
-        # Log the mock response
-        print("Mock Calendly API Response:", mock_response)
-
-        
-        candidate_name=request.candidate_name
-        candidate_email=request.candidate_email
-        job_title=request.job_title
-        calendly_link=mock_response["resource"]["booking_url"]
-        
-        body= (f"Dear {candidate_name},\n\n"
-            f"Congratulations! You've been shortlisted for the {job_title} role.\n"
-            f"Please use the following link to book a meeting at your convenience:\n\n"
-            f"{calendly_link}\n\n"
-            f"Best regards,\nRecruitment Team")
-        msg = MIMEText( body )
-        msg["Subject"] = f"Meeting Invitation for {job_title}"
-        msg["From"] = SMTP_EMAIL
-        msg["To"] = candidate_email
-        print(msg)
-        
-        # Send the email using SMTP
-        #comment- below code as we don't have credential to send. 
-        # with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        #     server.starttls()
-        #     server.login(SMTP_EMAIL, SMTP_PASSWORD)
-        #     server.send_message(msg)
-
-        print(f"Calendly link sent to {candidate_name} ({candidate_email}) for {job_title}.")
-        return {
-            "status": "success",
-            "message": f"Calendly link sent to {request.candidate_email}",
-            "link": mock_response["resource"]["booking_url"],
-            "msg":body  
+
+def check_config():
+    # A missing key fails readiness instead of the first /match
+    if not os.getenv("GROQ_API_KEY"):
+        raise RuntimeError("GROQ_API_KEY is not set")
+
+
+def warm_data():
+    # Snapshot download and index builds, which the first /match would otherwise wait for
+    snapshot = snapshot_cache.get()
+    candidate_index.sync(snapshot.candidates, snapshot.version, resume_cache.peek)
+    if DEDUP_ENABLED:
+        duplicate_index.sync(snapshot.candidates, snapshot.version, resume_cache.peek)
+
+
+def warm_connections():
+    # Opens keep-alive connections to the Groq and Calendly hosts; the data host is warmed by the snapshot fetch
+    for url in (str(get_llm_client().base_url), CALENDLY_SCHEDULING_LINKS_URL):
+        origin = urlparse(url)._replace(path="/", params="", query="", fragment="").geturl()
+        try:
+            http_clients.client.head(origin)
+        except Exception as e:
+            logger.warning("Could not pre-connect to %s: %s", origin, str(e))
+
+
+warmup = Warmup({
+    "config": check_config,
+    "imports": load_lazy_modules,
+    "data": warm_data,
+    "connections": warm_connections,
+    "pdf_workers": pdf_extractor.start,
+})
+
+
+# FastAPI endpoint
+@app.post("/match", response_model=List[MatchResponse])
+async def match_candidates(request: MatchRequest, http_request: Request, response: Response):
+    deadline = match_deadline(request)
+    assess = make_assessor(request)
+    selected = await select_within_deadline(request, deadline)
+    if selected is None:
+        response.headers["X-Match-Partial"] = "true"
+        response.headers["X-Match-Pending"] = str(request.top_k or MATCH_TOP_K)
+        return []
+    posting, top_candidates, duplicates = selected
+
+    # Score all candidates concurrently, keeping the original candidate order; when the time
+    # budget runs out only the candidates scored so far are returned
+    tasks = start_scoring(request, assess, posting, top_candidates, duplicates, deadline)
+    groups = {}
+    async for position, group in completed_groups(tasks, deadline, http_request):
+        groups[position] = group
+    matches = [match for position in sorted(groups) for match in groups[position]]
+    pending = len(top_candidates) - sum(1 for match in matches if match.duplicate_of is None)
+    if pending:
+        response.headers["X-Match-Partial"] = "true"
+        response.headers["X-Match-Pending"] = str(pending)
+
+    #if we set manual thresold then HR don't need to move to next stage system automtically take care of that. 
+    # Move to next stage and notify if approved
+    # if score > 70:  # Threshold for approval
+    #     if move_candidate_to_next_stage(candidate["id"]):
+    #         send_candidate_email(candidate, posting["text"])
+    #         print(f"Moved {candidate['name']} to next stage and sent email.")
+    #     else:
+    #         print(f"Failed to move {candidate['name']} to next stage.")
+
+    return matches
+
+
+# Streaming variant of /match: one NDJSON line per candidate as soon as it is scored,
+# followed by a final summary line.
+@app.post("/match/stream")
+async def match_candidates_stream(request: MatchRequest):
+    started = time.monotonic()
+    deadline = match_deadline(request)
+    assess = make_assessor(request)
+    selected = await select_within_deadline(request, deadline)
+    if selected is None:
+        summary = {
+            "type": "summary", "job_id": request.job_id, "job_title": None, "count": 0, "failed": 0,
+            "top_score": None, "partial": True, "pending": request.top_k or MATCH_TOP_K,
+            "cancel_reason": deadline.reason, "elapsed_seconds": round(time.monotonic() - started, 3),
         }
+        return StreamingResponse(iter([json.dumps(summary) + "\n"]), media_type="application/x-ndjson")
+    posting, top_candidates, duplicates = selected
 
-    except Exception as e:
-        print(f"Error in mock Calendly link generation: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate Calendly link: {str(e)}")
-    
+    async def events():
+        tasks = start_scoring(request, assess, posting, top_candidates, duplicates, deadline)
+        scores = []
+        count = scored = 0
+        try:
+            # A client that disconnects cancels this generator, which cancels the scoring
+            async for _, group in completed_groups(tasks, deadline):
+                for match in group:
+                    count += 1
+                    scored += match.duplicate_of is None
+                    if match.match_score is not None:
+                        scores.append(match.match_score)
+                    yield json.dumps({"type": "match", "data": jsonable_encoder(match)}) + "\n"
+            pending = len(top_candidates) - scored
+            yield json.dumps({
+                "type": "summary",
+                "job_id": request.job_id,
+                "job_title": posting["text"],
+                "count": count,
+                "failed": count - len(scores),
+                "top_score": max(scores) if scores else None,
+                "partial": pending > 0,
+                "pending": pending,
+                "cancel_reason": deadline.reason if pending else None,
+                "elapsed_seconds": round(time.monotonic() - started, 3),
+            }) + "\n"
+        finally:
+            # Client went away before all candidates were scored
+            if not all(task.done() for task in tasks):
+                deadline.cancel("client_disconnected")
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+
+
+def stored_result_view(row: Dict) -> Dict:
+    # Same field names as MatchResponse, plus when and by which run the assessment was made
+    view = dict(row, match_score=row["score"])
+    del view["score"]
+    return view
+
+
+# Stored rankings: a posting's current assessments best first, paged with an opaque cursor
+@app.get("/postings/{job_id}/results")
+async def get_posting_results(job_id: str, limit: int = 20, cursor: Optional[str] = None):
+    limit = min(max(limit, 1), 200)
+    try:
+        rows, next_cursor = await asyncio.to_thread(results_store.leaderboard, job_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = await asyncio.to_thread(results_store.count, job_id)
+    return {
+        "job_id": job_id,
+        "total": total,
+        "results": [stored_result_view(row) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+@app.get("/postings/{job_id}/top")
+async def get_posting_top(job_id: str, n: int = 10):
+    rows, _ = await asyncio.to_thread(results_store.leaderboard, job_id, min(max(n, 1), 200))
+    return {"job_id": job_id, "results": [stored_result_view(row) for row in rows]}
+
+
+# Every assessment of one candidate across postings, newest first
+@app.get("/candidates/{candidate_id}/history")
+async def get_candidate_history(candidate_id: str, limit: int = 50, cursor: Optional[str] = None):
+    limit = min(max(limit, 1), 200)
+    try:
+        rows, next_cursor = await asyncio.to_thread(results_store.history, candidate_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "candidate_id": candidate_id,
+        "results": [stored_result_view(row) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+def cluster_order(candidate_ids: List[str]) -> List[str]:
+    # Stable sort by the position of each candidate's cluster, one cluster_id lookup per candidate
+    order = {candidate_id: position for position, candidate_id in enumerate(candidate_ids)}
+    return sorted(candidate_ids, key=lambda candidate_id: order.get(duplicate_index.cluster_id(candidate_id), order[candidate_id]))
+
+
+# Bulk scoring of the whole candidate pool for a posting, processed in the background
+@app.post("/scoring-jobs")
+async def create_scoring_job(request: ScoringJobRequest):
+    snapshot = await asyncio.to_thread(fetch_data)
+    if request.job_id not in snapshot.postings_by_id:
+        raise HTTPException(status_code=404, detail="Job posting not found")
 
+    candidate_ids = [candidate["id"] for candidate in snapshot.candidates]
+    if DEDUP_ENABLED:
+        # Records of the same person are queued next to each other, so they land in one chunk and are scored once
+        await asyncio.to_thread(duplicate_index.sync, snapshot.candidates, snapshot.version, resume_cache.peek)
+        candidate_ids = await asyncio.to_thread(cluster_order, candidate_ids)
+    options = {"batch": request.batch, "use_cache": not request.bypass_cache}
+    scoring_job_id = await asyncio.to_thread(
+        scoring_jobs.submit, request.job_id, request.model_name, options, candidate_ids
+    )
+    return {"scoring_job_id": scoring_job_id, "status": "queued", "total": len(candidate_ids)}
+
+
+@app.get("/scoring-jobs/{scoring_job_id}")
+async def get_scoring_job(scoring_job_id: str):
+    job = await asyncio.to_thread(scoring_jobs.status, scoring_job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scoring job not found")
+    return job
+
+
+@app.get("/scoring-jobs/{scoring_job_id}/results")
+async def get_scoring_job_results(scoring_job_id: str, offset: int = 0, limit: int = 50):
+    job = await asyncio.to_thread(scoring_job_store.get, scoring_job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scoring job not found")
+
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), 500)
+    results = await asyncio.to_thread(scoring_job_store.results, scoring_job_id, offset, limit)
+    total = await asyncio.to_thread(scoring_job_store.result_count, scoring_job_id)
+    for rank, result in enumerate(results, start=offset + 1):
+        result["rank"] = rank
+    return {
+        "scoring_job_id": scoring_job_id,
+        "status": job["status"],
+        "total_results": total,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if offset + limit < total else None,
+        "results": results,
+    }
+
+
+@app.delete("/scoring-jobs/{scoring_job_id}")
+async def cancel_scoring_job(scoring_job_id: str):
+    job = await asyncio.to_thread(scoring_job_store.get, scoring_job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scoring job not found")
+    if job["status"] in ("completed", "failed", "cancelled"):
+        return {"scoring_job_id": scoring_job_id, "status": job["status"]}
+    if not await asyncio.to_thread(scoring_jobs.cancel, scoring_job_id):
+        # Finished between the read and the cancel
+        job = await asyncio.to_thread(scoring_job_store.get, scoring_job_id)
+        return {"scoring_job_id": scoring_job_id, "status": job["status"]}
+    return {"scoring_job_id": scoring_job_id, "status": "cancelled"}
+
+
+
+
+def create_scheduling_link() -> Dict:
+    # Mock API call to Calendly, over the shared keep-alive pool
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {CALENDLY_API_KEY}"
+    }
+    payload = {
+        "max_event_count": 1,
+        "owner": "https://api.calendly.com/event_types/012345678901234567890",
+        "owner_type": "EventType"
+    }
+    # A spare unused scheduling link is harmless, so failed creations are safe to retry
+    with span("calendly_link"):
+        response = http_clients.post(CALENDLY_SCHEDULING_LINKS_URL, headers=headers, json=payload, retry_unsafe=True)
+        response.raise_for_status()
+    mock_response = response.json()
+    logger.debug("Mock Calendly API Response: %s", mock_response)
+    return mock_response
+
+
+def build_invitation(request: CalendlyRequest, calendly_link: str) -> Tuple[str, MIMEText]:
+    body= (f"Dear {request.candidate_name},\n\n"
+        f"Congratulations! You've been shortlisted for the {request.job_title} role.\n"
+        f"Please use the following link to book a meeting at your convenience:\n\n"
+        f"{calendly_link}\n\n"
+        f"Best regards,\nRecruitment Team")
+    msg = MIMEText( body )
+    msg["Subject"] = f"Meeting Invitation for {request.job_title}"
+    msg["From"] = SMTP_EMAIL
+    msg["To"] = request.candidate_email
+    logger.debug("Email message: %s", msg)
+    return body, msg
 
 
-# Pre-filtering function - Commenting now as are not doing it yet.
-# def pre_filter_candidate(candidate: Dict, posting: Dict) -> bool:
-#     """Filter candidates based on 40% match criteria."""
-#     match_criteria = 0
-#     total_criteria = 5  # location, skills/tags, experience, job title, education
+def shortlist_key(request: CalendlyRequest) -> str:
+    return content_hash([request.candidate_id, request.candidate_email.strip().lower(), request.job_title.strip()])
 
-#     # Location match
-#     job_location = posting["categories"]["location"]
-#     cand_location = candidate["opportunityLocation"] or candidate["location"]
-#     if job_location.lower() in cand_location.lower():
-#         match_criteria += 1
 
-#     # Skills/Tags match
-#     job_skills = set(posting["content"].get("lists", [{}])[1].get("content", "").lower().split())
-#     cand_skills = set(tag.lower() for tag in candidate["tags"])
-#     if job_skills & cand_skills:
-#         match_criteria += 1
+def dispatch_invitation(request: CalendlyRequest, force: bool) -> Dict:
+    """Creates the scheduling link and emails one shortlisted candidate, at most once per key."""
+    key = shortlist_key(request)
+    result = {"candidate_id": request.candidate_id, "candidate_email": request.candidate_email}
+    claimed, record = dispatch_store.claim(key, request.candidate_id, request.candidate_email, request.job_title, force)
+    if not claimed:
+        status = "already_sent" if record["status"] == "sent" else "in_progress"
+        return {**result, "status": status, "link": record["link"], "attempts": record["attempts"], "error": None}
 
-#     # Experience match (inferred from tags or resume if available)
-#     job_exp = "5+" if "senior" in posting["text"].lower() else "1+"
-#     cand_exp = any("year" in tag.lower() or "experience" in tag.lower() for tag in candidate["tags"])
-#     if cand_exp or job_exp == "1+":
-#         match_criteria += 1
+    # Reuse the link from an earlier failed attempt instead of creating another one
+    link = record["link"] if record else None
+    try:
+        if not link:
+            link = create_scheduling_link()["resource"]["booking_url"]
+        _, msg = build_invitation(request, link)
+        # Emails are only logged unless SEND_EMAILS is on; such dispatches can be repeated later
+        if SEND_EMAILS:
+            send_smtp_message(msg)
+        status = "sent" if SEND_EMAILS else "logged"
+    except Exception as e:
+        logger.error("Failed to dispatch invitation to %s: %s", request.candidate_email, str(e))
+        attempts = dispatch_store.finish(key, "failed", link=link, error=str(e))
+        return {**result, "status": "failed", "link": link, "attempts": attempts, "error": str(e)}
+
+    attempts = dispatch_store.finish(key, status, link=link)
+    logger.info("Calendly link sent to %s (%s) for %s.", request.candidate_name, request.candidate_email, request.job_title)
+    return {**result, "status": status, "link": link, "attempts": attempts, "error": None}
 
-#     # Job title match
-#     job_title = posting["text"].lower()
-#     cand_title = candidate.get("headline", "").lower()
-#     if any(word in cand_title for word in job_title.split()):
-#         match_criteria += 1
 
-#     match_criteria += 1 
+@app.post("/generate-calendly-link-send-email")
+async def generate_calendly_link(request: CalendlyRequest):
+    # Same idempotency key as the bulk dispatch, so a candidate is never emailed twice for a job
+    result = await asyncio.to_thread(dispatch_invitation, request, False)
+    if result["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Failed to generate Calendly link: {result['error']}")
+    if result["status"] == "in_progress":
+        raise HTTPException(status_code=409, detail=f"An invitation to {request.candidate_email} is already being sent")
+
+    body, _ = build_invitation(request, result["link"])
+    if result["status"] == "already_sent":
+        message = f"Calendly link was already sent to {request.candidate_email}"
+    else:
+        message = f"Calendly link sent to {request.candidate_email}"
+    return {
+        "status": "success",
+        "dispatch_status": result["status"],
+        "message": message,
+        "link": result["link"],
+        "msg": body,
+    }
+    
 
-#     return (match_criteria / total_criteria) >= 0.4
 
+
+@app.post("/shortlist/dispatch")
+async def dispatch_shortlist(request: ShortlistDispatchRequest):
+    if len(request.candidates) > DISPATCH_MAX_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"At most {DISPATCH_MAX_CANDIDATES} candidates per dispatch")
+
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(DISPATCH_CONCURRENCY)
+
+    async def dispatch(item: CalendlyRequest) -> Dict:
+        async with semaphore:
+            return await asyncio.to_thread(dispatch_invitation, item, request.force)
+
+    # Candidates listed twice in the same request are only dispatched once
+    seen = set()
+    tasks = []
+    for item in request.candidates:
+        key = shortlist_key(item)
+        if key in seen:
+            tasks.append(None)
+            continue
+        seen.add(key)
+        tasks.append(asyncio.create_task(dispatch(item)))
+    try:
+        await asyncio.gather(*(task for task in tasks if task is not None))
+    finally:
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+
+    results = []
+    for item, task in zip(request.candidates, tasks):
+        if task is None:
+            results.append({"candidate_id": item.candidate_id, "candidate_email": item.candidate_email,
+                            "status": "duplicate", "link": None, "attempts": 0, "error": None})
+        else:
+            results.append(task.result())
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {
+        "total": len(results),
+        "counts": counts,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "results": results,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# Readiness probe: 200 once the warm-up is done, 503 before (a failed warm-up is started again)
+@app.get("/ready")
+async def get_ready(response: Response):
+    warmup.start()
+    if not warmup.ready:
+        response.status_code = 503
+    return warmup.status()
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "warmup": warmup.status(),
+        "snapshot": snapshot_cache.stats(),
+        "resume_cache": resume_cache.stats(),
+        "assessment_cache": assessment_cache.stats(),
+        "candidate_index": candidate_index.stats(),
+        "duplicates": duplicate_index.stats(),
+        "results_store": results_store.stats(),
+        "prompt_compiler": prompt_compiler.stats(),
+        "cascade": cascade_calibration.stats(),
+        "smtp": smtp_pool.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+    }
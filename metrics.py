@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("candidate_matcher.metrics")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    labels = _format_labels(self.labelnames + ("le",), key + (repr(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Counter or gauge whose values are read from a callback at scrape time, for numbers
+    that already live elsewhere (like cache hit counters)."""
+
+    def __init__(self, name: str, documentation: str, metric_type: str, labelnames: Tuple[str, ...],
+                 callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning("Metric callback %s failed: %s", self.name, e)
+            return lines
+        for key, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {float(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "candidate_matcher_stage_seconds", "Time spent in each hot-path stage.", ("stage",)
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "candidate_matcher_stage_errors_total", "Exceptions raised inside a hot-path stage.", ("stage",)
+))
+LLM_REQUESTS = REGISTRY.register(Counter(
+    "candidate_matcher_llm_requests_total", "Chat completion calls by model and outcome.", ("model", "outcome")
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "candidate_matcher_llm_tokens_total", "Tokens reported by the LLM provider.", ("model", "kind")
+))
+LLM_EARLY_STOPS = REGISTRY.register(Counter(
+    "candidate_matcher_llm_early_stops_total", "Streamed completions closed as soon as the JSON answer was complete.", ("model",)
+))
+ASSESSMENT_ERRORS = REGISTRY.register(Counter(
+    "candidate_matcher_assessment_errors_total", "Assessments that fell back to an error result.", ("reason",)
+))
+CASCADE_ESCALATIONS = REGISTRY.register(Counter(
+    "candidate_matcher_cascade_escalations_total", "Triage results re-scored by the escalation model.",
+    ("triage_model", "escalation_model", "reason")
+))
+DUPLICATES_SKIPPED = REGISTRY.register(Counter(
+    "candidate_matcher_duplicates_skipped_total", "Duplicate candidate records that reused another record's assessment.", ("source",)
+))
+MATCH_CANCELLATIONS = REGISTRY.register(Counter(
+    "candidate_matcher_match_cancellations_total", "/match calls that cancelled unfinished scoring, by reason.", ("reason",)
+))
+HTTP_RETRIES = REGISTRY.register(Counter(
+    "candidate_matcher_http_retries_total", "Outbound HTTP requests retried by host and reason.", ("host", "reason")
+))
+
+
+@contextmanager
+def span(stage: str, **context):
+    """Times a block into candidate_matcher_stage_seconds and counts exceptions raised in it."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("span stage=%s seconds=%.4f %s", stage, elapsed, context)
+
+
+def record_llm_usage(model_name: str, usage: Optional[object]):
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model_name, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model_name, kind="completion")
+
+
+def register_stats(name: str, documentation: str, metric_type: str, source: Callable[[], Dict], fields: Iterable[str]):
+    """Exposes selected numeric fields of a stats() dict as one metric labelled by field."""
+    fields = tuple(fields)
+
+    def collect():
+        stats = source()
+        return {(field,): stats.get(field) for field in fields}
+
+    return REGISTRY.register(CallbackMetric(name, documentation, metric_type, ("field",), collect))
@@ -0,0 +1,148 @@
+import faulthandler
+import io
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+
+# Workers time their own parses where SIGALRM exists, so time spent queued for a worker doesn't count
+WORKER_TIMEOUTS = hasattr(signal, "setitimer")
+# A worker stuck in native code ignores the alarm; it exits this long after the timeout instead
+HARD_TIMEOUT_GRACE = 5.0
+
+
+class ParseTimeout(TimeoutError):
+    pass
+
+
+def _alarm(signum, frame):
+    raise ParseTimeout()
+
+
+def extract_text(content: bytes, max_chars: int, max_pages: int, timeout: Optional[float] = None) -> str:
+    """Runs in a worker process. Stops reading pages once max_chars or max_pages is reached,
+    and raises ParseTimeout once the parse itself has run for timeout seconds."""
+    if timeout is None:
+        return _read_pages(content, max_chars, max_pages)
+    signal.signal(signal.SIGALRM, _alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    faulthandler.dump_traceback_later(timeout + HARD_TIMEOUT_GRACE, exit=True)
+    try:
+        return _read_pages(content, max_chars, max_pages)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        faulthandler.cancel_dump_traceback_later()
+
+
+def _read_pages(content: bytes, max_chars: int, max_pages: int) -> str:
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(content))
+    parts = []
+    total = 0
+    for page_number, page in enumerate(reader.pages):
+        if page_number >= max_pages:
+            break
+        text = page.extract_text() or ""
+        parts.append(text)
+        total += len(text)
+        if total >= max_chars:
+            break
+    return "".join(parts)[:max_chars]
+
+
+def load_parser():
+    # Worker process initializer, so the first resume a worker parses doesn't pay for the import
+    import PyPDF2  # noqa: F401
+
+
+class PdfExtractor:
+    """Parses PDFs on a process pool so CPU-bound PyPDF2 work uses all cores and never runs on
+    the request thread. Oversized files are rejected up front and each worker stops a parse that
+    runs past the timeout, counted from when the worker starts it, so a pathological PDF can't
+    pin a worker forever while the other workers' parses carry on.
+    """
+
+    def __init__(self, workers: int, timeout: float, max_bytes: int, max_chars: int, max_pages: int):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.max_pages = max_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn instead of fork: the server process has threads running
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=load_parser,
+                )
+            return self._pool
+
+    def _restart_pool(self, pool: ProcessPoolExecutor, kill: bool = False):
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        if kill:
+            # Without worker-side timeouts a stuck worker never returns, so the pool's processes are killed
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        """Spawns a first worker ahead of the first resume; called from the warm-up."""
+        self._get_pool().submit(int).result(timeout=max(self.timeout, 30))
+
+    def extract(self, content: bytes) -> str:
+        if len(content) > self.max_bytes:
+            self.rejected += 1
+            raise ValueError(f"PDF is {len(content)} bytes, limit is {self.max_bytes}")
+
+        if not WORKER_TIMEOUTS:
+            pool = self._get_pool()
+            future = pool.submit(extract_text, content, self.max_chars, self.max_pages)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                self.timeouts += 1
+                self._restart_pool(pool, kill=True)
+                raise TimeoutError(f"PDF parsing took longer than {self.timeout}s")
+            except BrokenProcessPool:
+                self._restart_pool(pool)
+                raise
+
+        for attempt in range(2):
+            pool = self._get_pool()
+            started = time.monotonic()
+            try:
+                return pool.submit(extract_text, content, self.max_chars, self.max_pages, self.timeout).result()
+            except ParseTimeout:
+                self.timeouts += 1
+                raise TimeoutError(f"PDF parsing took longer than {self.timeout}s")
+            except BrokenProcessPool:
+                # A worker that hit the hard limit exits and breaks the pool for every parse on it
+                self._restart_pool(pool)
+                if time.monotonic() - started >= self.timeout:
+                    # Most likely the parse that took the worker down, retrying it would break the new pool too
+                    self.timeouts += 1
+                    raise TimeoutError(f"PDF parsing took longer than {self.timeout}s")
+                # Parses that were only caught up in the crash are retried once on a fresh pool
+                if attempt:
+                    raise
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
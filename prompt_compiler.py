@@ -0,0 +1,237 @@
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple
+
+from assessment_cache import content_hash
+from candidate_index import posting_query, tokenize
+
+# Passages break at line ends and sentence ends, then get packed up to this many words
+PASSAGE_SPLIT_RE = re.compile(r"\n+|(?<=[.!?;])\s+")
+PASSAGE_MAX_WORDS = 30
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough 4 characters per token estimate, good enough for budgeting prompts
+    return len(text) // 4 + 1
+
+
+def build_job_details(posting: Dict) -> Dict:
+    return {
+        "title": posting["text"],
+        "commitment": posting["categories"]["commitment"],
+        "location": posting["categories"]["location"],
+        "team": posting["categories"]["team"],
+        "all_locations": posting["categories"]["allLocations"],
+        "tags": posting["tags"],
+        "description": posting["content"]["description"],
+        "requirements": "\n".join([f"{lst['text']}: {lst['content']}" for lst in posting["content"]["lists"]]),
+        "country": posting["country"],
+        "workplace_type": posting["workplaceType"]
+    }
+
+
+def render_job_block(job_details: Dict) -> str:
+    return "\n".join([
+        f"        Title: {job_details['title']}",
+        f"        Commitment: {job_details['commitment']}",
+        f"        Location: {job_details['location']}",
+        f"        Team: {job_details['team']}",
+        f"        All Locations: {', '.join(job_details['all_locations'])}",
+        f"        Tags: {', '.join(job_details['tags'])}",
+        f"        Description: {job_details['description']}",
+        f"        Requirements: {job_details['requirements']}",
+        f"        Country: {job_details['country']}",
+        f"        Workplace Type: {job_details['workplace_type']}",
+    ])
+
+
+def render_candidate_block(cand_details: Dict) -> str:
+    lines = [
+        f"        Headline: {cand_details['headline']}",
+        f"        Location: {cand_details['location']}",
+        f"        Tags: {', '.join(cand_details['tags'])}",
+        f"        Origin: {cand_details['origin']}",
+        f"        Opportunity Location: {cand_details['opportunity_location']}",
+    ]
+    if cand_details["resume_excerpts"]:
+        lines.append("        Resume Excerpts:")
+        lines.extend(f"        - {passage}" for passage in cand_details["resume_excerpts"])
+    else:
+        lines.append("        Resume Excerpts: not available")
+    return "\n".join(lines)
+
+
+def render_batch_candidate(candidate_id: str, cand_details: Dict) -> str:
+    return f"        Candidate ID: {candidate_id}\n{render_candidate_block(cand_details)}"
+
+
+EVALUATION_CRITERIA = """        Evaluation Criteria:
+        Assess the candidate based on:
+
+        Skill & Experience Match - Does the candidate's experience align with job requirements?
+        Location Fit - Is the candidate located in an eligible area or open to relocation?
+        Education & Qualifications - Do they meet or exceed the required credentials?
+
+        Language Proficiency - Are they fluent in the necessary languages?"""
+
+
+# Everything that only depends on the posting comes first and the candidate last, so prompts for
+# the same posting share a byte-identical prefix the provider can cache
+ASSESSMENT_PREFIX = """
+        You are an AI talent evaluator. Your task is to assess how well a candidate matches a job posting based on their skills, experience, and qualifications.
+
+        Instructions:
+        Evaluate the candidate objectively without bias or unnecessary criticism.
+        Ensure no humiliation or negative wording in your assessment.
+        Return only a structured JSON response—no extra explanations or text.
+
+        Job Posting Details:
+{job_block}
+
+{criteria}
+
+        Output Format (JSON Only)
+        Return your response in the exact format below, with a match score (0-100) and a concise, constructive assessment.
+
+        {{
+          "score": <number>,
+          "assessment": "<brief, neutral explanation of strengths and areas for improvement>"
+        }}
+
+        Candidate Details:
+"""
+
+BATCH_PREFIX = """
+        You are an AI talent evaluator. Your task is to assess how well each of the candidates below matches a job posting based on their skills, experience, and qualifications.
+
+        Instructions:
+        Evaluate every candidate independently and objectively without bias or unnecessary criticism.
+        Ensure no humiliation or negative wording in your assessment.
+        Return only a structured JSON response—no extra explanations or text.
+
+        Job Posting Details:
+{job_block}
+
+{criteria}
+
+        Output Format (JSON Only)
+        Return a JSON array with exactly one entry per candidate in the format below, each with a match score (0-100) and a concise, constructive assessment.
+
+        [
+          {{
+            "candidate_id": "<candidate id>",
+            "score": <number>,
+            "assessment": "<brief, neutral explanation of strengths and areas for improvement>"
+          }}
+        ]
+
+        Candidates:
+"""
+
+
+def split_passages(text: str, max_words: int = PASSAGE_MAX_WORDS) -> List[str]:
+    """Splits resume text into whitespace-normalized passages of at most max_words words."""
+    passages, current = [], []
+    for piece in PASSAGE_SPLIT_RE.split(text or ""):
+        words = piece.split()
+        while words:
+            room = max_words - len(current)
+            if room <= 0 or (current and len(words) > room and len(words) <= max_words):
+                # Start a new passage rather than cutting a sentence that fits in one
+                passages.append(" ".join(current))
+                current = []
+                continue
+            current.extend(words[:room])
+            words = words[room:]
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def select_passages(text: str, query: Counter, token_budget: int, k1: float = 1.2, b: float = 0.75) -> List[str]:
+    """The resume passages most relevant to the query that fit in token_budget, in resume order.
+
+    Passages are ranked with BM25 over the resume's own passages; the budget left after the
+    matching passages is filled from the top of the resume.
+    """
+    passages = split_passages(text)
+    costs = [estimate_tokens(passage) + 1 for passage in passages]
+    if sum(costs) <= token_budget:
+        return passages
+
+    term_counts = [Counter(tokenize(passage)) for passage in passages]
+    lengths = [sum(counts.values()) for counts in term_counts]
+    avg_len = (sum(lengths) / len(lengths)) or 1.0
+    doc_freq = Counter(term for counts in term_counts for term in counts)
+    scores = []
+    for counts, length in zip(term_counts, lengths):
+        score = 0.0
+        for term, query_tf in query.items():
+            tf = counts.get(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(passages) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += query_tf * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(score)
+
+    chosen, seen, used = [], set(), 0
+    for index in sorted(range(len(passages)), key=lambda i: (-scores[i], i)):
+        # Repeated passages (page headers, footers) are only sent once
+        if passages[index] not in seen and used + costs[index] <= token_budget:
+            chosen.append(index)
+            seen.add(passages[index])
+            used += costs[index]
+    return [passages[index] for index in sorted(chosen)]
+
+
+class CompiledPosting:
+    """Job details, relevance query and prompt prefixes of one posting, built once."""
+
+    def __init__(self, posting: Dict):
+        self.job_details = build_job_details(posting)
+        self.key = content_hash(self.job_details)
+        self.query = posting_query(posting)
+        job_block = render_job_block(self.job_details)
+        self.prefix = ASSESSMENT_PREFIX.format(job_block=job_block, criteria=EVALUATION_CRITERIA)
+        self.batch_prefix = BATCH_PREFIX.format(job_block=job_block, criteria=EVALUATION_CRITERIA)
+
+    def assessment_prompt(self, cand_details: Dict) -> str:
+        return f"{self.prefix}{render_candidate_block(cand_details)}\n"
+
+    def batch_prompt(self, batch: List[Tuple[str, Dict]]) -> str:
+        candidate_blocks = "\n\n".join(render_batch_candidate(candidate_id, details) for candidate_id, details in batch)
+        return f"{self.batch_prefix}{candidate_blocks}\n"
+
+
+class PromptCompiler:
+    """LRU of compiled postings keyed by a hash of the posting, so the posting part of every
+    prompt is rendered once and stays byte-identical across candidates."""
+
+    def __init__(self, max_postings: int = 256):
+        self.max_postings = max_postings
+        self._compiled: "OrderedDict[str, CompiledPosting]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, posting: Dict) -> CompiledPosting:
+        key = content_hash(posting)
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+        compiled = CompiledPosting(posting)
+        with self._lock:
+            self._compiled[key] = compiled
+            while len(self._compiled) > self.max_postings:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"postings": len(self._compiled), "hits": self.hits, "misses": self.misses}
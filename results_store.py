@@ -0,0 +1,152 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+COLUMNS = ("id", "job_id", "candidate_id", "name", "email", "job_title", "score", "assessment", "error",
+           "model_name", "prompt_version", "triage_score", "duplicate_of", "source", "created_at")
+
+
+def encode_cursor(values: List) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> List:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+class ResultsStore:
+    """SQLite (WAL) history of every assessment, with its model, prompt version and time.
+
+    Each (posting, candidate) pair has one current row, the latest scored assessment, which
+    the leaderboard reads through a partial (job_id, score) index; older assessments stay in
+    the table as history. A failed assessment never replaces a scored one, and an assessment
+    identical to the current one (a cache hit) is not stored again. Listings page with
+    keyset cursors, so deep pages cost the same as the first.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS match_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                candidate_id TEXT NOT NULL,
+                name TEXT,
+                email TEXT,
+                job_title TEXT,
+                score REAL,
+                assessment TEXT,
+                error TEXT,
+                model_name TEXT,
+                prompt_version TEXT,
+                triage_score REAL,
+                duplicate_of TEXT,
+                source TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                current INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_match_results_leaderboard
+                ON match_results (job_id, score DESC, id DESC) WHERE current = 1;
+            CREATE INDEX IF NOT EXISTS idx_match_results_candidate
+                ON match_results (candidate_id, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_match_results_pair
+                ON match_results (job_id, candidate_id) WHERE current = 1;
+            """
+        )
+        self._conn.commit()
+
+    def record(self, rows: List[Dict], source: str) -> int:
+        """Stores assessments (dicts with the non-id columns) and returns how many were new."""
+        now = time.time()
+        stored = 0
+        with self._lock:
+            for row in rows:
+                current = self._conn.execute(
+                    "SELECT id, score, assessment, model_name, prompt_version FROM match_results "
+                    "WHERE job_id = ? AND candidate_id = ? AND current = 1",
+                    (row["job_id"], row["candidate_id"]),
+                ).fetchone()
+                if current is not None and tuple(current[1:]) == (
+                    row.get("score"), row.get("assessment"), row.get("model_name"), row.get("prompt_version")
+                ):
+                    continue
+                # Failed assessments are kept as history but don't hide an earlier score
+                is_current = row.get("score") is not None or current is None or current[1] is None
+                if is_current and current is not None:
+                    self._conn.execute("UPDATE match_results SET current = 0 WHERE id = ?", (current[0],))
+                self._conn.execute(
+                    "INSERT INTO match_results (job_id, candidate_id, name, email, job_title, score, assessment, error, "
+                    "model_name, prompt_version, triage_score, duplicate_of, source, created_at, current) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row["job_id"], row["candidate_id"], row.get("name"), row.get("email"), row.get("job_title"),
+                     row.get("score"), row.get("assessment"), row.get("error"), row.get("model_name"),
+                     row.get("prompt_version"), row.get("triage_score"), row.get("duplicate_of"), source, now,
+                     int(is_current)),
+                )
+                stored += 1
+            self._conn.commit()
+        return stored
+
+    def _rows(self, sql: str, params: Tuple) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def leaderboard(self, job_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Current assessments for a posting, best score first (unscored last), and the next cursor."""
+        select = f"SELECT {', '.join(COLUMNS)} FROM match_results WHERE job_id = ? AND current = 1"
+        order = " ORDER BY score DESC, id DESC LIMIT ?"
+        if cursor is None:
+            rows = self._rows(select + order, (job_id, limit))
+        else:
+            score, last_id = decode_cursor(cursor)
+            if score is None:
+                rows = self._rows(select + " AND score IS NULL AND id < ?" + order, (job_id, last_id, limit))
+            else:
+                rows = self._rows(
+                    select + " AND (score < ? OR (score = ? AND id < ?) OR score IS NULL)" + order,
+                    (job_id, score, score, last_id, limit),
+                )
+        next_cursor = encode_cursor([rows[-1]["score"], rows[-1]["id"]]) if len(rows) == limit else None
+        return rows, next_cursor
+
+    def history(self, candidate_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Every assessment of a candidate across postings, newest first, and the next cursor."""
+        select = f"SELECT {', '.join(COLUMNS)} FROM match_results WHERE candidate_id = ?"
+        if cursor is None:
+            rows = self._rows(select + " ORDER BY id DESC LIMIT ?", (candidate_id, limit))
+        else:
+            _, last_id = decode_cursor(cursor)
+            rows = self._rows(select + " AND id < ? ORDER BY id DESC LIMIT ?", (candidate_id, last_id, limit))
+        next_cursor = encode_cursor([None, rows[-1]["id"]]) if len(rows) == limit else None
+        return rows, next_cursor
+
+    def count(self, job_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM match_results WHERE job_id = ? AND current = 1", (job_id,)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total, current = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(current), 0) FROM match_results"
+            ).fetchone()
+        return {"assessments": total, "current": current}
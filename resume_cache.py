@@ -0,0 +1,263 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from deadline import check_deadline
+from http_clients import HttpClients
+from metrics import span
+
+
+class ResumeCache:
+    """Persistent resume text cache.
+
+    Extracted text is stored once per PDF content hash, so the same resume served under
+    several URLs is only parsed once. Each URL keeps its ETag/Last-Modified validators for
+    conditional revalidation, and entries are evicted least-recently-used once the text
+    blobs on disk go over max_bytes. The index lives in SQLite and is updated row by row; the
+    byte total and how many URLs share each blob are kept in memory, so neither a miss nor an
+    eviction has to look at every entry.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, revalidate_after: float, http: HttpClients,
+                 max_download_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.http = http
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.max_download_bytes = max_download_bytes
+        self._lock = threading.Lock()
+        # url -> {"content_hash", "etag", "last_modified", "size", "checked_at", "last_access"}, oldest first
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # content_hash -> number of URLs pointing at the blob, and the bytes of all referenced blobs
+        self._refs: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.content_hits = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Losing the last few index writes in a power cut only costs re-downloads
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resumes (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                checked_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._load_index()
+
+    def _load_index(self):
+        cursor = self._conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        missing = []
+        for row in cursor.execute("SELECT * FROM resumes ORDER BY last_access"):
+            entry = dict(row)
+            url = entry.pop("url")
+            if os.path.exists(self._blob_path(entry["content_hash"])):
+                self._add(url, entry)
+            else:
+                missing.append((url,))
+        if missing:
+            self._conn.executemany("DELETE FROM resumes WHERE url = ?", missing)
+            self._conn.commit()
+
+    def _add(self, url: str, entry: Dict):
+        # The new reference is taken before the old one is released, so a URL whose content
+        # didn't change keeps its blob
+        refs = self._refs.get(entry["content_hash"], 0)
+        if not refs:
+            self._bytes += entry["size"]
+        self._refs[entry["content_hash"]] = refs + 1
+        self._release(self._entries.pop(url, None))
+        self._entries[url] = entry
+
+    def _release(self, entry: Optional[Dict]):
+        # Removes the entry's blob once no URL points at it any more
+        if entry is None:
+            return
+        content_hash = entry["content_hash"]
+        self._refs[content_hash] -= 1
+        if not self._refs[content_hash]:
+            del self._refs[content_hash]
+            self._bytes -= entry["size"]
+            try:
+                os.remove(self._blob_path(content_hash))
+            except OSError:
+                pass
+
+    def _store(self, url: str, entry: Dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO resumes (url, content_hash, etag, last_modified, size, checked_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, entry["content_hash"], entry.get("etag"), entry.get("last_modified"), entry["size"],
+             entry["checked_at"], entry["last_access"]),
+        )
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.txt")
+
+    def _read_blob(self, content_hash: str) -> Optional[str]:
+        try:
+            with open(self._blob_path(content_hash), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_blob(self, content_hash: str, text: str):
+        # A temp file of its own per writer: threads that missed on the same content at the same
+        # time each replace the blob with identical text instead of truncating each other's file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{content_hash}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._blob_path(content_hash))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _touch(self, url: str, checked: bool = False):
+        entry = self._entries[url]
+        entry["last_access"] = time.time()
+        if checked:
+            entry["checked_at"] = entry["last_access"]
+        self._entries.move_to_end(url)
+        self._conn.execute("UPDATE resumes SET last_access = ?, checked_at = ? WHERE url = ?",
+                           (entry["last_access"], entry["checked_at"], url))
+        self._conn.commit()
+
+    def _evict(self):
+        evicted = []
+        while self._entries and self._bytes > self.max_bytes:
+            url, entry = self._entries.popitem(last=False)
+            # Blobs are shared between URLs with identical content, only unreferenced ones are removed
+            self._release(entry)
+            evicted.append((url,))
+        if evicted:
+            self.evictions += len(evicted)
+            self._conn.executemany("DELETE FROM resumes WHERE url = ?", evicted)
+
+    def _download(self, response: httpx.Response) -> bytes:
+        # Stop reading as soon as the document goes over the size cap, or the request it is for is abandoned
+        limit = self.max_download_bytes
+        declared = response.headers.get("Content-Length")
+        if limit is not None and declared and declared.isdigit() and int(declared) > limit:
+            raise ValueError(f"Resume is {declared} bytes, limit is {limit}")
+        chunks = []
+        size = 0
+        for chunk in response.iter_bytes(chunk_size=64 * 1024):
+            check_deadline()
+            size += len(chunk)
+            if limit is not None and size > limit:
+                raise ValueError(f"Resume is larger than {limit} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _request(self, url: str, headers: Dict, entry: Optional[Dict]):
+        # Returns (response, content); content is None when a cached entry was not modified
+        with span("resume_download"), self.http.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and entry:
+                return response, None
+            response.raise_for_status()
+            return response, self._download(response)
+
+    def peek(self, url: str) -> Optional[str]:
+        """Returns the cached text for a URL without any network access."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return None
+            return self._read_blob(entry["content_hash"])
+
+    def get(self, url: str, extract: Callable[[bytes], str]) -> str:
+        """Returns the extracted resume text, downloading and parsing only when needed."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry and time.time() - entry["checked_at"] < self.revalidate_after:
+                text = self._read_blob(entry["content_hash"])
+                if text is not None:
+                    self.hits += 1
+                    self._touch(url)
+                    return text
+                entry = None
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response, content = self._request(url, headers, entry)
+
+        if content is None:
+            with self._lock:
+                text = self._read_blob(entry["content_hash"])
+                if text is not None and url in self._entries:
+                    self.hits += 1
+                    self.revalidations += 1
+                    self._touch(url, checked=True)
+                    return text
+            # The blob disappeared while revalidating, fetch the document again
+            response, content = self._request(url, {}, None)
+
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        text = self._read_blob(content_hash)
+        if text is None:
+            text = extract(content)
+            self._write_blob(content_hash, text)
+        else:
+            self.content_hits += 1
+
+        with self._lock:
+            self.misses += 1
+            now = time.time()
+            entry = {
+                "content_hash": content_hash,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "size": len(text.encode("utf-8")),
+                "checked_at": now,
+                "last_access": now,
+            }
+            self._add(url, entry)
+            self._store(url, entry)
+            self._evict()
+            self._conn.commit()
+        return text
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "revalidations": self.revalidations,
+                "content_hits": self.content_hits,
+                "evictions": self.evictions,
+            }
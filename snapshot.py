@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional
+
+from http_clients import HttpClients
+
+
+class Snapshot:
+    """Point-in-time view of postings and candidates with id indexes."""
+
+    def __init__(self, postings: List[Dict], candidates: List[Dict], version: int, fetched_at: float):
+        self.postings = postings
+        self.candidates = candidates
+        self.postings_by_id = {posting["id"]: posting for posting in postings}
+        self.candidates_by_id = {candidate["id"]: candidate for candidate in candidates}
+        self.version = version
+        self.fetched_at = fetched_at
+
+
+class SnapshotCache:
+    """Keeps the postings and candidates lists in memory.
+
+    The first call fetches synchronously. Afterwards a snapshot older than ttl is still served
+    while a background thread refreshes it with conditional (ETag/Last-Modified) requests, so
+    an unchanged upstream list costs a 304 instead of a full download. Upstreams without
+    validators are compared by a hash of the response body. The version only moves when the
+    content actually changed, which lets dependants (like the candidate index) skip rebuilding.
+    """
+
+    def __init__(self, postings_url: str, candidates_url: str, ttl: float, http: HttpClients):
+        self.postings_url = postings_url
+        self.candidates_url = candidates_url
+        self.ttl = ttl
+        self.http = http
+        self._snapshot: Optional[Snapshot] = None
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self._payloads: Dict[str, List[Dict]] = {}
+        self._digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._refreshing = False
+        self.refreshes = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def _fetch_list(self, url: str, key: str) -> List[Dict]:
+        headers = {}
+        validators = self._validators.get(url, {})
+        if url in self._payloads:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = self.http.get(url, headers=headers)
+        if response.status_code == 304 and url in self._payloads:
+            self.not_modified += 1
+            return self._payloads[url]
+        response.raise_for_status()
+
+        self._validators[url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        digest = hashlib.sha256(response.content).hexdigest()
+        if url in self._payloads and self._digests.get(url) == digest:
+            # Same body as last time: hand back the same list so the snapshot version doesn't move
+            return self._payloads[url]
+        items = response.json().get(key, [])
+        self._payloads[url] = items
+        self._digests[url] = digest
+        return items
+
+    def refresh(self) -> Snapshot:
+        with self._refresh_lock:
+            try:
+                postings = self._fetch_list(self.postings_url, "postings")
+                candidates = self._fetch_list(self.candidates_url, "candidates")
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                raise
+            self.refreshes += 1
+            self.last_error = None
+
+            with self._lock:
+                current = self._snapshot
+                if current and current.postings is postings and current.candidates is candidates:
+                    current.fetched_at = time.time()
+                else:
+                    version = current.version + 1 if current else 1
+                    self._snapshot = Snapshot(postings, candidates, version, time.time())
+                return self._snapshot
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            # Keep serving the stale snapshot, the error is visible in stats()
+            pass
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self) -> Snapshot:
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot and time.time() - snapshot.fetched_at > self.ttl and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        if snapshot is None:
+            # Concurrent first callers wait for a single initial fetch
+            with self._refresh_lock:
+                snapshot = self._snapshot or self.refresh()
+        return snapshot
+
+    def stats(self) -> Dict:
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "version": snapshot.version if snapshot else None,
+                "age_seconds": round(time.time() - snapshot.fetched_at, 3) if snapshot else None,
+                "ttl_seconds": self.ttl,
+                "postings": len(snapshot.postings) if snapshot else 0,
+                "candidates": len(snapshot.candidates) if snapshot else 0,
+                "refreshing": self._refreshing,
+                "refreshes": self.refreshes,
+                "not_modified": self.not_modified,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
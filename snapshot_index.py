@@ -0,0 +1,97 @@
+import hashlib
+import json
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class SnapshotIndex:
+    """Base for the in-process candidate indexes that follow the snapshot.
+
+    Keeps a fingerprint of the fields a subclass indexes, plus any resume text, per candidate,
+    so sync() only hands new, changed and removed records to the subclass hooks.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._fingerprints: Dict[str, str] = {}
+        self._resumes: Dict[str, str] = {}
+
+    @staticmethod
+    def _fingerprint(fields: Dict) -> str:
+        return hashlib.md5(json.dumps(fields, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _indexed_fields(self, candidate: Dict) -> Dict:
+        """The candidate fields the index depends on; records are re-indexed when they change."""
+        raise NotImplementedError
+
+    def _add(self, candidate_id: str, candidate: Dict, fields: Dict):
+        raise NotImplementedError
+
+    def _drop(self, candidate_id: str):
+        """Takes a known record out of the index, before it is re-added or removed."""
+        raise NotImplementedError
+
+    def _forget(self, candidate_id: str):
+        pass
+
+    def _resume_attached(self, candidate_id: str, had_resume: bool):
+        raise NotImplementedError
+
+    def _synced(self):
+        pass
+
+    def upsert(self, candidate: Dict, resume_text: Optional[str] = None):
+        with self._lock:
+            candidate_id = candidate["id"]
+            fields = self._indexed_fields(candidate)
+            fingerprint = self._fingerprint(fields)
+            unchanged = self._fingerprints.get(candidate_id) == fingerprint
+            if resume_text is not None and resume_text != self._resumes.get(candidate_id):
+                self._resumes[candidate_id] = resume_text
+                unchanged = False
+            if unchanged:
+                return
+            if candidate_id in self._fingerprints:
+                self._drop(candidate_id)
+            self._fingerprints[candidate_id] = fingerprint
+            self._add(candidate_id, candidate, fields)
+
+    def attach_resume(self, candidate_id: str, resume_text: str):
+        """Re-indexes a known candidate once its resume text becomes available."""
+        with self._lock:
+            if candidate_id not in self._fingerprints or self._resumes.get(candidate_id) == resume_text:
+                return
+            had_resume = candidate_id in self._resumes
+            self._resumes[candidate_id] = resume_text
+            self._resume_attached(candidate_id, had_resume)
+
+    def remove(self, candidate_id: str):
+        with self._lock:
+            if candidate_id not in self._fingerprints:
+                return
+            self._drop(candidate_id)
+            self._forget(candidate_id)
+            self._fingerprints.pop(candidate_id, None)
+            self._resumes.pop(candidate_id, None)
+
+    def sync(self, candidates: Iterable[Dict], version=None, resume_lookup=None):
+        """Brings the index in line with a candidate snapshot, touching only changed entries.
+        A snapshot older than the one already synced (a request that fetched it before a refresh) is ignored."""
+        with self._lock:
+            if version is not None and self.version is not None and version <= self.version:
+                return
+            seen = set()
+            for candidate in candidates:
+                seen.add(candidate["id"])
+                resume_text = None
+                if candidate["id"] not in self._fingerprints and resume_lookup and candidate.get("resume_url"):
+                    resume_text = resume_lookup(candidate["resume_url"])
+                self.upsert(candidate, resume_text)
+            for candidate_id in [cid for cid in self._fingerprints if cid not in seen]:
+                self.remove(candidate_id)
+            self._synced()
+            self.version = version
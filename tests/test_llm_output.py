@@ -0,0 +1,94 @@
+import pytest
+
+from llm_output import JsonStreamParser, normalize_score, validate_assessment, validate_batch_entries
+
+
+def feed_all(parser: JsonStreamParser, chunks):
+    for chunk in chunks:
+        value = parser.feed(chunk)
+        if value is not None:
+            return value
+    return None
+
+
+def chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+ANSWER = '<think>maybe {"score": 1}</think>Sure: ```json\n{"score": 72, "assessment": "Solid {python} match"}\n``` done'
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, len(ANSWER)])
+def test_think_block_and_tags_split_across_chunks(size):
+    parser = JsonStreamParser("{")
+    assert feed_all(parser, chunked(ANSWER, size)) == {"score": 72, "assessment": "Solid {python} match"}
+    assert parser.done
+
+
+def test_split_think_tags_hide_their_content():
+    parser = JsonStreamParser("{")
+    chunks = ["<thi", "nk>", '{"score": 5, "assessment": "draft"}', "</th", "ink>", '{"score": 60, "assessment": "final"}']
+    assert feed_all(parser, chunks) == {"score": 60, "assessment": "final"}
+
+
+def test_unclosed_think_block_yields_nothing():
+    parser = JsonStreamParser("{")
+    assert feed_all(parser, ['<think>{"score": 5, "assessment": "x"}', " still thinking"]) is None
+    assert not parser.done
+
+
+def test_brackets_and_escaped_quotes_inside_strings():
+    text = '{"score": 40, "assessment": "Knows C++ [arrays] and {maps}, says \\"}]\\" a lot"}'
+    for size in (1, 4, len(text)):
+        parser = JsonStreamParser("{")
+        assert feed_all(parser, chunked(text, size))["assessment"] == 'Knows C++ [arrays] and {maps}, says "}]" a lot'
+
+
+def test_braces_in_prose_are_skipped():
+    parser = JsonStreamParser("{")
+    assert parser.feed('Weights {skills, experience} apply. {"score": 50, "assessment": "ok"}') == \
+        {"score": 50, "assessment": "ok"}
+
+
+def test_validator_skips_values_that_are_not_the_answer():
+    parser = JsonStreamParser("{", validate_assessment)
+    assert parser.feed('{"a": 1} {"score": 2, "assessment": "weak"}') == {"score": 2, "assessment": "weak"}
+
+
+def test_without_validator_first_value_wins():
+    assert JsonStreamParser("{").feed('{"a": 1} {"score": 2, "assessment": "weak"}') == {"a": 1}
+
+
+def test_batch_prose_with_brackets():
+    text = 'I rank [1] first, then [c2, c1]. [{"candidate_id": "c1", "score": 80, "assessment": "good"}]'
+    parser = JsonStreamParser("[", lambda value: validate_batch_entries(value, {"c1", "c2"}))
+    for chunk in chunked(text, 3):
+        value = parser.feed(chunk)
+        if value is not None:
+            break
+    assert value == [{"candidate_id": "c1", "score": 80, "assessment": "good"}]
+
+
+def test_no_value_passes_validator():
+    parser = JsonStreamParser("{", validate_assessment)
+    assert parser.feed('{"score": "high", "assessment": "x"} {"other": true}') is None
+    assert not parser.done and parser.value is None
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (85, 85.0),
+    (85.5, 85.5),
+    ("85", 85.0),
+    (" 85/100 ", 85.0),
+    ("1e3", 100.0),
+    ("1e-1", 0.1),
+    (-5, 0.0),
+    (250, 100.0),
+])
+def test_normalize_score(raw, expected):
+    assert normalize_score(raw) == expected
+
+
+@pytest.mark.parametrize("raw", [True, None, "high", "85 out of 100", "8/10", "", float("nan"), float("inf"), [85]])
+def test_normalize_score_rejects(raw):
+    assert normalize_score(raw) is None
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("candidate_matcher.warmup")
+
+
+class Warmup:
+    """Runs the work a worker's first requests would otherwise pay for, and tracks readiness.
+
+    Steps are blocking callables run at the same time in worker threads, so CPU-bound imports
+    overlap with upstream fetches. The worker serves requests meanwhile; /ready reports 503
+    until every step succeeded, and a failed warm-up is started again by the next check.
+    """
+
+    def __init__(self, steps: Dict[str, Callable[[], object]]):
+        self.steps = steps
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.step_seconds: Dict[str, float] = {}
+        self.attempts = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Starts the warm-up in the background unless it is running or done; needs a running loop."""
+        if self.state in ("pending", "failed"):
+            self.state = "warming"
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _step(self, name: str, step: Callable[[], object]):
+        started = time.perf_counter()
+        await asyncio.to_thread(step)
+        self.step_seconds[name] = round(time.perf_counter() - started, 3)
+
+    async def _run(self):
+        self.attempts += 1
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(self._step(name, step) for name, step in self.steps.items()),
+                                        return_exceptions=True)
+        self.seconds = round(time.perf_counter() - started, 3)
+        errors = [f"{name}: {outcome}" for name, outcome in zip(self.steps, outcomes) if isinstance(outcome, Exception)]
+        if errors:
+            self.state = "failed"
+            self.error = "; ".join(errors)
+            logger.error("Warm-up failed after %.2fs: %s", self.seconds, self.error)
+        else:
+            self.state = "ready"
+            self.error = None
+            logger.info("Warm-up done in %.2fs: %s", self.seconds, self.step_seconds)
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "error": self.error,
+            "seconds": self.seconds,
+            "steps": dict(self.step_seconds),
+            "attempts": self.attempts,
+        }